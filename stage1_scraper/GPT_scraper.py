@@ -5,7 +5,6 @@ import subprocess
 import requests
 import os
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
@@ -14,8 +13,18 @@ from selenium.webdriver.chrome.options import Options
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
-from prompts import get_prompts
+from prompts import get_prompts, known_prompt_count
 from data_processor import BrandMentionProcessor
+from checkpoint import open_checkpoint
+from response_cache import ResponseCache
+from chatgpt_page import (
+    INPUT_MODES, INPUT_SELECTORS, SEND_BUTTON_SELECTORS, RESPONSE_SELECTORS, ASSISTANT_TURN_SELECTOR,
+    LocatorCache, WebDriverCallCounter, count_assistant_turns, insert_prompt_text, wait_for_response
+)
+
+CHROME_PATH = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+DEFAULT_DEBUG_PORT = 9222
+DEFAULT_USER_DATA_DIR = "/tmp/chrome-debug"
 
 
 class GPTScrapper:
@@ -23,30 +32,49 @@ class GPTScrapper:
     GPT Scraper - Automated brand mention extraction from ChatGPT responses
     """
     
-    def __init__(self, delay=3):
+    def __init__(self, delay=3, checkpoint_file=None, response_timeout=180, stable_ms=1500, input_mode="human",
+                 debug_port=DEFAULT_DEBUG_PORT, user_data_dir=DEFAULT_USER_DATA_DIR, processor=None,
+                 response_cache=None):
+        if input_mode not in INPUT_MODES:
+            raise ValueError(f"input_mode must be one of {INPUT_MODES}")
         self.delay = delay
+        self.input_mode = input_mode  # "fast" | "paste" | "human"
+        self.typing_times = []  # seconds spent entering each prompt
+        self.response_timeout = response_timeout  # max seconds to wait for one answer
+        self.stable_ms = stable_ms  # answer is done once the text is unchanged this long
+        self.debug_port = debug_port
+        self.user_data_dir = user_data_dir  # each Chrome session needs its own profile dir
         self.driver = None
-        self.processor = BrandMentionProcessor()
+        self.locators = LocatorCache()  # remembers which selector found input / send button / answers
+        self.webdriver_calls = None  # WebDriverCallCounter, set once connected
+        self.calls_per_prompt = []
+        self.last_response_details = None  # markdown / structure of the last answer (chatgpt_page.extract_last_response)
+        self.pause_on_missing_input = True  # ask the user to fix the page (ScraperPool turns this off)
+        self.processor = processor or BrandMentionProcessor()  # ScraperPool passes one shared processor
+        self.checkpoint_file = checkpoint_file  # existing .jsonl log to resume from
+        self.response_cache = response_cache  # ResponseCache - reuse fresh answers instead of re-asking
         
         print(f" CHATGPT SCRAPER")
         print(f" Quick delay: {delay} seconds")
+        print(f" Input mode: {input_mode}")
         print(f" Uses existing browser session")
     
-    def setup_chrome_debug_session(self):
+    def setup_chrome_debug_session(self, kill_existing=True, wait_for_login=True):
         """Initialize Chrome with remote debugging for GPT scraping"""
         print("\n🚀 Setting up Chrome debug session for GPT scraping...")
         
         try:
-            # Kill any existing Chrome processes
-            subprocess.run(["pkill", "-f", "Chrome"], capture_output=True)
-            time.sleep(1)  # Faster startup
+            if kill_existing:
+                # Kill any existing Chrome processes
+                subprocess.run(["pkill", "-f", "Chrome"], capture_output=True)
+                time.sleep(1)  # Faster startup
             
             # Start Chrome with remote debugging and suppress logs
-            debug_port = 9222
+            debug_port = self.debug_port
             chrome_cmd = [
-                "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+                CHROME_PATH,
                 f"--remote-debugging-port={debug_port}",
-                "--user-data-dir=/tmp/chrome-debug",
+                f"--user-data-dir={self.user_data_dir}",
                 "--no-first-run",
                 "--no-default-browser-check",
                 "--disable-logging",
@@ -62,9 +90,10 @@ class GPTScrapper:
             time.sleep(3)  # Faster startup
             
             print("   Chrome started with debugging enabled")
-            print("   Please log in to ChatGPT in the Chrome window that opened")
-            print("   Take your time to complete login and reach chat page")
-            input("   Press Enter when you're logged in and ready...")
+            if wait_for_login:
+                print("   Please log in to ChatGPT in the Chrome window that opened")
+                print("   Take your time to complete login and reach chat page")
+                input("   Press Enter when you're logged in and ready...")
             
             return debug_port
             
@@ -81,6 +110,7 @@ class GPTScrapper:
             options.add_experimental_option("debuggerAddress", f"localhost:{debug_port}")
             
             self.driver = webdriver.Chrome(options=options)
+            self.webdriver_calls = WebDriverCallCounter(self.driver)
             
             print("   ✅ Connected to existing Chrome session!")
             print(f"  Current URL: {self.driver.current_url}")
@@ -98,34 +128,41 @@ class GPTScrapper:
         # Shorter wait
         time.sleep(random.uniform(1, 2))
         
-        input_selectors = [
-            "textarea[placeholder*='Message']",
-            "textarea[placeholder*='Send a message']", 
-            "div[contenteditable='true']",
-            "textarea",
-            "#prompt-textarea"
-        ]
-        
-        for selector in input_selectors:
-            try:
-                print(f"   Trying: {selector}")
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                
-                for element in elements:
-                    if element.is_displayed() and element.is_enabled():
-                        print(f"   ✅ Found: {selector}")
-                        return element
-                        
-            except Exception as e:
-                print(f"   ⚠️ Error with {selector}: {e}")
+        try:
+            found = self.locators.find(self.driver, "input", INPUT_SELECTORS)
+            if found.element is not None:
+                print(f"   ✅ Found: {found.selector}")
+                return found.element
+        except Exception as e:
+            print(f"   ⚠️ Input lookup error: {e}")
         
         print("   ❌ No input found")
         return None
     
     def type_prompt_to_chatgpt(self, element, prompt_text):
-        """Type the brand mention prompt into ChatGPT input field"""
-        print(f"typing prompt")
+        """Enter the brand mention prompt into ChatGPT input field using the run's input mode"""
+        print(f"typing prompt ({self.input_mode} mode)")
+        typing_start = time.time()
+        
+        if self.input_mode == "human":
+            self.type_prompt_like_human(element, prompt_text)
+        else:
+            try:
+                inserted = insert_prompt_text(self.driver, element, prompt_text, mode=self.input_mode)
+            except Exception as e:
+                print(f"   ⚠️ {self.input_mode} input failed ({e}) - typing instead")
+                self.type_prompt_like_human(element, prompt_text)
+            else:
+                if not inserted:
+                    print(f"   ⚠️ {self.input_mode} input didn't stick - typing instead")
+                    self.type_prompt_like_human(element, prompt_text)
         
+        typing_time = time.time() - typing_start
+        self.typing_times.append(typing_time)
+        print(f"   ⌨️ Prompt entered in {typing_time:.2f}s")
+    
+    def type_prompt_like_human(self, element, prompt_text):
+        """Type the prompt one character at a time with human-like pauses"""
         # Quick focus
         element.click()
         time.sleep(random.uniform(0.3, 0.5))
@@ -172,28 +209,21 @@ class GPTScrapper:
             
         except Exception as e:
             print(f"   ⚠️ Enter failed: {e}")
+            self.locators.invalidate("input")
         
         # Try finding send button manually
         try:
             print("   🔍 Looking for send button...")
-            send_button_selectors = [
-                "button[data-testid='send-button']",
-                "button[aria-label*='Send']",
-                "button svg",
-                "*[role='button'] svg"
-            ]
-            
-            for selector in send_button_selectors:
+            found = self.locators.find(self.driver, "send_button", SEND_BUTTON_SELECTORS)
+            if found.element is not None:
+                time.sleep(0.5)
                 try:
-                    buttons = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for button in buttons:
-                        if button.is_displayed() and button.is_enabled():
-                            time.sleep(0.5)
-                            button.click()
-                            print(f"   ✅ Clicked button: {selector}")
-                            return True
-                except:
-                    continue
+                    found.element.click()
+                    print(f"   ✅ Clicked button: {found.selector}")
+                    return True
+                except Exception as e:
+                    print(f"   ⚠️ Click failed: {e}")
+                    self.locators.invalidate("send_button")
                     
         except Exception as e:
             print(f"  Button search failed: {e}")
@@ -201,53 +231,92 @@ class GPTScrapper:
         print("  All submission methods failed")
         return False
     
-    def wait_for_chatgpt_response(self):
+    def wait_for_chatgpt_response(self, previous_turns=None, turn_selector=ASSISTANT_TURN_SELECTOR):
         """Wait for and capture ChatGPT's response to the brand mention prompt"""
         print(" Waiting for response ...")
         
-        # (15 seconds for complex prompts)
-        initial_wait = 15
-        print(f"   ⏳ Initial wait for response generation: {initial_wait}s...")
-        time.sleep(initial_wait)
+        if previous_turns is None:
+            previous_turns = count_assistant_turns(self.driver, turn_selector)
         
-        response_selectors = [
-            "div[data-message-author-role='assistant']",
-            "div[data-testid*='conversation-turn']",
-            ".markdown", 
-            "div.whitespace-pre-wrap"
-        ]
+        # Returns as soon as the answer stops streaming (no fixed initial sleep)
+        wait_start = time.time()
+        try:
+            details = wait_for_response(
+                self.driver,
+                previous_turns,
+                timeout=self.response_timeout,
+                stable_ms=self.stable_ms,
+                turn_selector=turn_selector
+            )
+        except Exception as e:
+            print(f"   ⚠️ Completion detection error: {e}")
+            details = None
         
-        max_attempts = 15  # Reasonable attempts after initial wait
-        for attempt in range(max_attempts):
-            try:
-                for selector in response_selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            response_text = elements[-1].text.strip()
-                            if len(response_text) > 50:  # Higher threshold for confidence
-                                print(f"   ✅ Response found! ({len(response_text)} chars)")
-                                return response_text
-                    except:
-                        continue
-                
-                # Quick checks after initial wait
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"   ⚠️ Check {attempt + 1} error: {e}")
-                time.sleep(0.5)
+        # text + markdown + structure of the answer, fetched in one call
+        self.last_response_details = details
+        if details and details["text"]:
+            structure = details["structure"]
+            print(f"   ✅ Response complete! ({len(details['text'])} chars in {time.time() - wait_start:.1f}s)")
+            print(f"   📐 {structure['headings']} headings, {structure['list_items']} list items, "
+                  f"{structure['tables']} tables, {structure['code_blocks']} code blocks")
+            return details["text"]
         
         print("  No response after waiting")
         return None
     
-    def run_brand_mention_scraping(self):
-        """Execute the complete brand mention scraping workflow"""
+    def scrape_prompt(self, prompt):
+        """Type one prompt, submit it and return ChatGPT's answer (None on failure)"""
+        calls_before = self.webdriver_calls.calls if self.webdriver_calls else 0
+        try:
+            return self._scrape_prompt(prompt)
+        finally:
+            if self.webdriver_calls:
+                prompt_calls = self.webdriver_calls.calls - calls_before
+                self.calls_per_prompt.append(prompt_calls)
+                print(f"   🔁 WebDriver calls for this prompt: {prompt_calls}")
+    
+    def _scrape_prompt(self, prompt):
+        # Find ChatGPT input field
+        input_element = self.locate_chatgpt_input_field()
+        if not input_element:
+            if self.pause_on_missing_input:
+                print("   ❌ No input - manual intervention needed")
+                input("   ⏸️ Please fix and press Enter...")
+            return None
+        
+        # Type prompt for brand mentions
+        self.type_prompt_to_chatgpt(input_element, prompt)
+        
+        # Remember how many answers are on the page, so we wait for a new one.
+        # The same lookup settles which selector matches answers on this page.
+        answers = self.locators.find(self.driver, "response", RESPONSE_SELECTORS, visible_only=False)
+        turn_selector = answers.selector or ASSISTANT_TURN_SELECTOR
+        
+        # Submit prompt to ChatGPT
+        if not self.submit_prompt_to_chatgpt(input_element):
+            print("   ❌ Submission failed")
+            return None
+        
+        # Wait for and capture response
+        response = self.wait_for_chatgpt_response(answers.count, turn_selector)
+        if not response:
+            print("   ❌ No response detected")
+            if answers.selector:
+                self.locators.invalidate("response")
+        return response
+    
+    def run_brand_mention_scraping(self, prompts=None):
+        """Execute the complete brand mention scraping workflow (prompts: any iterable, e.g. a PromptCatalog)"""
         print("\n🎯 STARTING BRAND MENTION SCRAPING FROM CHATGPT")
         print("=" * 60)
         
-        prompts = get_prompts()
-        print(f"📋 Loaded {len(prompts)} brand mention prompts")
+        # Iterated lazily: a big PromptCatalog is never loaded into memory
+        prompts = prompts if prompts is not None else get_prompts()
+        total_prompts = known_prompt_count(prompts)
+        if total_prompts is not None:
+            print(f"📋 Loaded {total_prompts} brand mention prompts")
+        else:
+            print("📋 Streaming brand mention prompts from the catalog")
         
         # Setup Chrome debug session
         debug_port = self.setup_chrome_debug_session()
@@ -258,67 +327,92 @@ class GPTScrapper:
         if not self.connect_to_chatgpt_session(debug_port):
             return False
         
+        # Every response is appended + fsynced to a checkpoint log as it arrives
+        resume = bool(self.checkpoint_file) and os.path.exists(self.checkpoint_file)
+        checkpoint_file = self.checkpoint_file or f"brand_mentions_results_{int(time.time())}.jsonl"
+        completed_prompts = open_checkpoint(self.processor, checkpoint_file, resume=resume)
+        print(f"📝 Checkpoint log: {checkpoint_file}")
+        
+        if completed_prompts:
+            prompts = (prompt for prompt in prompts if prompt not in completed_prompts)
+            total_prompts = None  # only known once the generator runs out
+            print(f"⏭️ Resuming: skipping {len(completed_prompts)} completed prompts")
+        
         try:
             print(f"\n🚀 Starting brand mention extraction...")
             successful_extractions = 0
+            attempted = 0
+            delay_next = False  # pause before every browser prompt but the first (none after the last)
             start_time = time.time()
             
             for i, prompt in enumerate(prompts, 1):
-                prompt_start = time.time()
-                print(f"\n📝 PROCESSING PROMPT {i}/{len(prompts)}")
+                attempted = i
+                progress = f"{i}/{total_prompts}" if total_prompts else str(i)
+                print(f"\n📝 PROCESSING PROMPT {progress}")
                 print("-" * 40)
                 print(f"Prompt: {prompt[:60]}...")
                 
-                # Find ChatGPT input field
-                input_element = self.locate_chatgpt_input_field()
-                if not input_element:
-                    print("   ❌ No input - manual intervention needed")
-                    input("   ⏸️ Please fix and press Enter...")
-                    continue
-                
-                # Type prompt for brand mentions
-                self.type_prompt_to_chatgpt(input_element, prompt)
-                
-                # Submit prompt to ChatGPT
-                if self.submit_prompt_to_chatgpt(input_element):
-                    # Wait for and capture response
-                    response = self.wait_for_chatgpt_response()
-                    
-                    if response:
-                        # Process response for brand mentions
-                        result = self.processor.process_response(prompt, response)
-                        print(f"   📊 Brands found: {result['brand_mentions']}")
+                # A fresh cached answer skips the browser (and the delay) entirely
+                if self.response_cache is not None:
+                    cached_response = self.response_cache.get(prompt)
+                    if cached_response:
+                        result = self.processor.process_response(prompt, cached_response)
+                        print(f"   💾 Cached answer - brands found: {result['brand_mentions']}")
                         successful_extractions += 1
-                        
-                        prompt_time = time.time() - prompt_start
-                        print(f"   ⏱️ Prompt completed in {prompt_time:.1f}s")
-                    else:
-                        print("   ❌ No response detected")
-                else:
-                    print("   ❌ Submission failed")
+                        continue
                 
-                # Short delay between prompts
-                if i < len(prompts):
+                # Short delay between browser prompts
+                if delay_next:
                     delay_time = random.uniform(self.delay, self.delay + 2)
                     print(f"   ⏳ Quick delay: {delay_time:.1f}s...")
                     time.sleep(delay_time)
+                
+                prompt_start = time.time()
+                response = self.scrape_prompt(prompt)
+                delay_next = True
+                if response:
+                    if self.response_cache is not None:
+                        self.response_cache.put(prompt, response)
+                    
+                    # Process response for brand mentions
+                    result = self.processor.process_response(prompt, response)
+                    print(f"   📊 Brands found: {result['brand_mentions']}")
+                    successful_extractions += 1
+                    
+                    prompt_time = time.time() - prompt_start
+                    print(f"   ⏱️ Prompt completed in {prompt_time:.1f}s")
             
             # Final results
             total_time = time.time() - start_time
             print(f"\n🎉 BRAND MENTION SCRAPING COMPLETE!")
-            print(f"   ✅ Success rate: {successful_extractions}/{len(prompts)}")
+            print(f"   ✅ Success rate: {successful_extractions}/{attempted}")
             print(f"   ⏱️ Total time: {total_time:.1f}s ({total_time/60:.1f} minutes)")
-            print(f"   📈 Average per prompt: {total_time/len(prompts):.1f}s")
+            print(f"   📈 Average per prompt: {total_time/max(attempted, 1):.1f}s")
+            if self.typing_times:
+                avg_typing = sum(self.typing_times) / len(self.typing_times)
+                print(f"   ⌨️ Typing ({self.input_mode} mode): {avg_typing:.2f}s avg per prompt, "
+                      f"{sum(self.typing_times):.1f}s total")
+            if self.calls_per_prompt:
+                avg_calls = sum(self.calls_per_prompt) / len(self.calls_per_prompt)
+                print(f"   🔁 WebDriver calls: {avg_calls:.1f} avg per prompt")
+            for line in self.locators.summary():
+                print(f"   🎯 Locator {line}")
+            if self.response_cache is not None:
+                print(f"   💾 Response cache: {self.response_cache.summary()}")
             
-            if successful_extractions > 0:
+            # Includes responses restored from the checkpoint log
+            if self.processor.processed_data:
                 self.processor.print_detailed_summary()
-                filename = f"brand_mentions_results_{int(time.time())}.json"
+                filename = os.path.splitext(checkpoint_file)[0] + ".json"
                 self.processor.save_to_json(filename)
                 print(f"💾 Saved: {filename}")
             
-            return successful_extractions > 0
+            return len(self.processor.processed_data) > 0
             
         finally:
+            self.processor.response_writer.close()
+            if self.response_cache is not None:
+                self.response_cache.close()
             if self.driver:
                 print("\n🔒 Keeping browser open for inspection...")
                 input("Press Enter to close browser...")
@@ -336,7 +430,12 @@ def main():
     choice = input("Start brand mention scraping? (y/n): ").strip().lower()
     
     if choice == 'y':
-        scraper = GPTScrapper(delay=3)
+        checkpoint_file = input("Resume from checkpoint? Enter its .jsonl path (or press Enter for a new run): ").strip()
+        input_mode = input(f"Input mode {INPUT_MODES} [human]: ").strip().lower() or "human"
+        use_cache = input("Reuse cached answers from this week? (y/n) [y]: ").strip().lower() != 'n'
+        response_cache = ResponseCache() if use_cache else None
+        scraper = GPTScrapper(delay=3, checkpoint_file=checkpoint_file or None, input_mode=input_mode,
+                              response_cache=response_cache)
         scraper.run_brand_mention_scraping()
     else:
         print("👋 Goodbye!")
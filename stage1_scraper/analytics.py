@@ -0,0 +1,149 @@
+"""
+ANALYTICS MODULE - optional NumPy backend for get_comprehensive_analysis
+
+Views the ResponseStore brand counts as a responses x brands matrix (no copy)
+and derives every per-brand statistic with vectorized reductions. Because the
+matrix is already there, distribution stats that would be expensive in pure
+Python come almost for free:
+
+- stddev and p50 / p90 / p99 mentions per response, per brand
+- optionally, brand co-occurrence (responses mentioning both brands). It is
+  brands x brands, so it's opt-in and only non-zero pairs are returned.
+
+NumPy is optional: if it isn't installed the processor keeps using its
+pure-Python running totals.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is an optional dependency
+    np = None
+
+# Rows per block for the chunked reductions, keeps temporaries small at millions of rows
+BLOCK_ROWS = 65536
+PERCENTILES = (50, 90, 99)
+
+
+def numpy_available():
+    return np is not None
+
+
+def count_matrix(store):
+    """
+    responses x brands view over the store's count array (zero-copy).
+
+    The view pins the store's buffer, so drop it before appending more rows.
+    """
+    counts = np.frombuffer(store.counts, dtype=np.uintc)
+    return counts.reshape(len(store), store.num_brands)
+
+
+def _histogram_percentiles(histogram, total):
+    """Linear-interpolation percentiles (np.percentile's default) read off value histograms"""
+    cumulative = histogram.cumsum(axis=0)
+    result = np.empty((histogram.shape[1], len(PERCENTILES)))
+    for j in range(histogram.shape[1]):
+        for i, q in enumerate(PERCENTILES):
+            position = (total - 1) * q / 100
+            lower = int(position)
+            low_value = np.searchsorted(cumulative[:, j], lower, side='right')
+            high_value = np.searchsorted(cumulative[:, j], min(lower + 1, total - 1), side='right')
+            result[j, i] = low_value + (position - lower) * (high_value - low_value)
+    return result
+
+
+def _sparse_co_occurrence(co_occurrence, brands):
+    """{brand: {other: responses mentioning both}} with zero pairs (and brands with none) left out"""
+    table = {}
+    for j, k in zip(*np.nonzero(co_occurrence)):
+        table.setdefault(brands[j], {})[brands[k]] = int(co_occurrence[j, k])
+    return table
+
+
+def vectorized_analysis(store, co_occurrence=False):
+    """
+    Compute all brand statistics for a non-empty ResponseStore in one pass
+    over the count matrix. Values are plain Python numbers (JSON friendly)
+    and match the pure-Python aggregates exactly.
+    co_occurrence=True adds the sparse brand co-occurrence table (quadratic
+    in the number of brands, so off by default).
+    """
+    if np is None:
+        raise ImportError("NumPy is required for the vectorized analytics backend")
+
+    brands = store.brands
+    num_brands = store.num_brands
+    total_responses = len(store)
+    matrix = count_matrix(store)
+
+    # value histogram per brand: histogram[v, j] = responses where brand j was mentioned v times.
+    # Totals, maxima, coverage, stddev and percentiles all fall out of it.
+    histogram = np.zeros((1, num_brands), dtype=np.int64)
+    co_matrix = np.zeros((num_brands, num_brands), dtype=np.float64) if co_occurrence else None
+    brand_ids = np.arange(num_brands, dtype=np.int64)
+
+    for start in range(0, total_responses, BLOCK_ROWS):
+        block = matrix[start:start + BLOCK_ROWS]
+
+        keys = block.astype(np.int64) * num_brands + brand_ids
+        block_rows = int(block.max()) + 1
+        block_histogram = np.bincount(keys.ravel(), minlength=block_rows * num_brands)
+        block_histogram = block_histogram.reshape(block_rows, num_brands)
+        if block_histogram.shape[0] > histogram.shape[0]:
+            block_histogram[:histogram.shape[0]] += histogram
+            histogram = block_histogram
+        else:
+            histogram[:block_histogram.shape[0]] += block_histogram
+
+        if co_matrix is not None:
+            present = (block > 0).astype(np.float64)
+            co_matrix += present.T @ present
+
+    values = np.arange(histogram.shape[0], dtype=np.int64)[:, None]
+    brand_totals = (histogram * values).sum(axis=0)
+    sum_squares = (histogram * values.astype(np.float64) ** 2).sum(axis=0)
+    coverage = total_responses - histogram[0]
+    brand_max = np.array([np.flatnonzero(histogram[:, j]).max() for j in range(num_brands)])
+    percentiles = _histogram_percentiles(histogram, total_responses)
+
+    means = brand_totals / total_responses
+    stddev = np.sqrt(np.maximum(sum_squares / total_responses - means * means, 0.0))
+
+    response_totals = np.frombuffer(store.totals, dtype=np.uintc)
+    response_lengths = np.frombuffer(store.response_lengths, dtype=np.uintc)
+    max_mentions_index = int(response_totals.argmax())
+
+    totals = {brand: int(brand_totals[j]) for j, brand in enumerate(brands)}
+    total_mentions = sum(totals.values())
+
+    brand_analysis = {}
+    brand_distribution = {}
+    for j, brand in enumerate(brands):
+        brand_total = totals[brand]
+        responses_with_mentions = int(coverage[j])
+        brand_analysis[brand] = {
+            "total_mentions": brand_total,
+            "percentage": (brand_total / total_mentions * 100) if total_mentions > 0 else 0,
+            "avg_per_response": brand_total / total_responses,
+            "max_in_single_response": int(brand_max[j]),
+            "responses_with_mentions": responses_with_mentions,
+            "response_coverage": (responses_with_mentions / total_responses * 100)
+        }
+        brand_distribution[brand] = {
+            "stddev": float(stddev[j]),
+            **{f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles[j])}
+        }
+
+    distribution_analysis = {"brand_distribution": brand_distribution}
+    if co_matrix is not None:
+        distribution_analysis["co_occurrence"] = _sparse_co_occurrence(co_matrix, brands)
+
+    return {
+        "brand_totals": totals,
+        "brand_analysis": brand_analysis,
+        "max_mentions_index": max_mentions_index,
+        "max_response_mentions": int(response_totals[max_mentions_index]),
+        "min_response_mentions": int(response_totals.min()),
+        "avg_response_length": int(response_lengths.sum(dtype=np.int64)) / total_responses,
+        "distribution_analysis": distribution_analysis
+    }
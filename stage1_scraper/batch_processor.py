@@ -0,0 +1,173 @@
+"""
+BATCH PROCESSOR MODULE - re-score captured responses offline, using all cores
+
+Whenever the brand list changes we re-score historical corpora. Instead of
+feeding BrandMentionProcessor one response at a time, this module reads
+already-captured prompt/response pairs and counts brand mentions in a
+ProcessPoolExecutor. Worker results are folded back into one processor in
+input order, so the summary and analysis are identical to the serial path.
+
+Accepted inputs (a single file or a directory of them):
+- *.json   scraper output files with "detailed_responses"
+- *.jsonl  one {"prompt": ..., "response": ..., "timestamp": ...} object per line
+- *.sqlite3 a ResponseCache file (every cached raw answer) - only when passed
+  directly: the cache sits next to the run logs and holds the same answers
+
+Usage:
+    python batch_processor.py <file-or-directory> [--workers N] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from brand_matcher import get_matcher
+from data_processor import BrandMentionProcessor
+from response_cache import ResponseCache
+
+CACHE_EXTENSIONS = ('.sqlite3',)
+
+
+def _iter_file_pairs(path):
+    """Yield {"prompt", "response", "timestamp"} dicts from one JSON / JSONL / cache file"""
+    if path.endswith(CACHE_EXTENSIONS):
+        with ResponseCache(path) as cache:
+            yield from cache.iter_pairs()
+        return
+
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    responses = data.get("detailed_responses") if isinstance(data, dict) else data
+    if not responses:
+        print(f"   ⚠️ No detailed_responses in {path} - skipping")
+        return
+    yield from responses
+
+
+def iter_response_pairs(source):
+    """
+    Yield captured prompt/response pairs from a file or a directory of files.
+
+    The scrapers save <run>.json next to their <run>.jsonl checkpoint log
+    with the same responses, so in a directory a .json with a .jsonl
+    sibling is skipped (otherwise every response would count twice).
+    Response caches hold the same answers again, so directory scans leave
+    them out - pass a cache file directly to re-score it.
+    """
+    if os.path.isdir(source):
+        names = set(os.listdir(source))
+        paths = []
+        for name in sorted(names):
+            if not name.endswith(('.json', '.jsonl')):
+                continue
+            if name.endswith('.json') and name + 'l' in names:
+                print(f"   ⏭️ Skipping {name} - same responses as {name}l")
+                continue
+            paths.append(os.path.join(source, name))
+    else:
+        paths = [source]
+
+    for path in paths:
+        for pair in _iter_file_pairs(path):
+            if pair.get("response") is None:
+                continue
+            yield pair
+
+
+def _count_batch(brands, texts):
+    """Worker: count brand mentions for a batch of responses"""
+    matcher = get_matcher(brands)  # compiled once per worker process
+    return [matcher.count(text) for text in texts]
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _record_batch(processor, batch, batch_counts):
+    for pair, brand_counts in zip(batch, batch_counts):
+        timestamp = pair.get("timestamp")
+        processor.record_result(
+            pair.get("prompt", ""),
+            pair["response"],
+            brand_counts,
+            timestamp=datetime.fromisoformat(timestamp) if timestamp else None
+        )
+
+
+def process_corpus(source, processor=None, workers=None, batch_size=256):
+    """
+    Count brand mentions for every captured response in source using a
+    process pool, and fold the results into one BrandMentionProcessor.
+
+    Batches are merged strictly in input order, so the result is identical
+    to calling process_response on each pair in turn.
+    """
+    if processor is None:
+        processor = BrandMentionProcessor()
+    brands = tuple(processor.target_brands)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2  # bounds memory: never read far ahead of the workers
+
+    print(f"\n🚀 Batch processing {source} with {workers} workers...")
+    start_time = time.time()
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in _batched(iter_response_pairs(source), batch_size):
+            texts = [pair["response"] for pair in batch]
+            pending.append((batch, pool.submit(_count_batch, brands, texts)))
+
+            if len(pending) >= max_in_flight:
+                done_batch, future = pending.popleft()
+                _record_batch(processor, done_batch, future.result())
+
+        while pending:
+            done_batch, future = pending.popleft()
+            _record_batch(processor, done_batch, future.result())
+
+    total_time = time.time() - start_time
+    print(f"   ✅ Processed {len(processor.processed_data)} responses in {total_time:.1f}s")
+    return processor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score captured ChatGPT responses for brand mentions")
+    parser.add_argument("source", help="JSON/JSONL/response cache file or directory of captured responses")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=256, help="responses per worker task")
+    parser.add_argument("--output", default=None, help="where to save the results JSON")
+    args = parser.parse_args()
+
+    processor = process_corpus(args.source, workers=args.workers, batch_size=args.batch_size)
+    if not processor.processed_data:
+        print("❌ No responses found")
+        return
+
+    processor.print_detailed_summary()
+    filename = args.output or f"brand_mentions_rescored_{int(time.time())}.json"
+    processor.save_to_json(filename)
+    print(f"💾 Saved: {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+"""
+BENCHMARKS - performance checks for the stage 1 processing pipeline
+
+Run from the stage1_scraper directory:
+    python benchmarks.py            # run everything
+    python benchmarks.py matcher    # run a single benchmark
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import string
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from analytics import numpy_available, vectorized_analysis
+from brand_matcher import BrandMatcher, expand_brand_dictionary
+from chatgpt_page import INPUT_SELECTORS, SEND_BUTTON_SELECTORS, LocatorCache, WebDriverCallCounter
+from prompts import get_prompts, get_target_brands
+from response_store import ResponseStore
+
+
+def _random_word(rng, min_len=4, max_len=10):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_len, max_len)))
+
+
+def make_brand_list(size, seed=7, overlapping=0.0):
+    """
+    Real target brands padded out with synthetic brand/SKU names.
+    overlapping: share of synthetic names that extend an earlier brand
+    ("Nike" -> "Nike Qwerty"), so some brand names contain others.
+    """
+    rng = random.Random(seed)
+    brands = list(get_target_brands())[:size]
+    # otherwise never reuse a word, so no brand name is contained in another one
+    used_words = {w for b in brands for w in b.lower().split()}
+    while len(brands) < size:
+        if brands and rng.random() < overlapping:
+            word = _random_word(rng)
+            if word not in used_words:
+                used_words.add(word)
+                brands.append(f"{rng.choice(brands)} {word.capitalize()}")
+            continue
+        words = [_random_word(rng) for _ in range(rng.randint(1, 3))]
+        if used_words.intersection(words) or len(set(words)) < len(words):
+            continue
+        used_words.update(words)
+        brands.append(' '.join(w.capitalize() for w in words))
+    return brands
+
+
+def make_corpus(brands, responses=200, words_per_response=400, mention_rate=0.05, seed=11):
+    """Synthetic ChatGPT-style responses with brands sprinkled in"""
+    rng = random.Random(seed)
+    filler = [_random_word(rng, 2, 9) for _ in range(2000)]
+    corpus = []
+    for _ in range(responses):
+        words = []
+        for _ in range(words_per_response):
+            if rng.random() < mention_rate:
+                words.append(rng.choice(brands))
+            else:
+                words.append(rng.choice(filler))
+        corpus.append(' '.join(words) + '.')
+    return corpus
+
+
+def legacy_count_brand_mentions(text, brands):
+    """The original per-brand regex loop, kept here as the baseline"""
+    text_lower = text.lower()
+    brand_counts = {}
+    for brand in brands:
+        pattern = r'\b' + re.escape(brand.lower()) + r'\b'
+        brand_counts[brand] = len(re.findall(pattern, text_lower))
+    return brand_counts
+
+
+def benchmark_matcher(brand_sizes=(5, 500, 5000), responses=100, overlapping=0.05):
+    """Old per-brand regex loop vs the single-pass BrandMatcher (some brand names overlap)"""
+    print("\n⏱️ BENCHMARK: brand matching (old loop vs single-pass matcher)")
+    print("=" * 60)
+
+    for size in brand_sizes:
+        brands = make_brand_list(size, overlapping=overlapping)
+        corpus = make_corpus(brands, responses=responses)
+        corpus_mb = sum(len(t) for t in corpus) / 1e6
+
+        start = time.perf_counter()
+        matcher = BrandMatcher(brands)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_results = [matcher.count(text) for text in corpus]
+        new_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        old_results = [legacy_count_brand_mentions(text, brands) for text in corpus]
+        old_time = time.perf_counter() - start
+
+        identical = old_results == new_results
+        print(f"   🔸 {size:>5} brands | {corpus_mb:.1f} MB corpus | {len(matcher.layers)} overlap layer(s)")
+        print(f"      old loop: {old_time:8.3f}s   matcher: {new_time:8.3f}s "
+              f"(+{build_time:.3f}s build)   speedup: {old_time / new_time:6.1f}x")
+        print(f"      identical counts: {'✅' if identical else '❌'}")
+
+
+def make_brand_dictionary(brands, seed=13):
+    """Synthetic BRAND_DICTIONARY: 2 aliases, 3 product lines and 1 exclusion per brand"""
+    rng = random.Random(seed)
+    used_words = {w for b in brands for w in b.lower().split()}
+
+    def fresh_word():
+        while True:
+            word = _random_word(rng, 5, 9)
+            if word not in used_words:
+                used_words.add(word)
+                return word
+
+    return {
+        brand: {
+            "aliases": [f"{brand} {fresh_word()}", f"{fresh_word()} {brand}"],
+            "product_lines": [fresh_word() for _ in range(3)],
+            "exclude": [f"{fresh_word()} {brand}"],
+        }
+        for brand in brands
+    }
+
+
+def legacy_count_variants(text, brand_variants):
+    """The old regex loop run over every name of every brand (no overlap handling)"""
+    text_lower = text.lower()
+    return {
+        brand: sum(len(re.findall(r'\b' + re.escape(v.lower()) + r'\b', text_lower)) for v in variants)
+        for brand, variants in brand_variants.items()
+    }
+
+
+def benchmark_aliases(brand_sizes=(5, 100, 1000), responses=20):
+    """Alias / product line / exclusion matching: regex loop over every variant vs one BrandMatcher"""
+    print("\n⏱️ BENCHMARK: brand dictionary matching (per-variant loop vs single-pass matcher)")
+    print("=" * 60)
+
+    for size in brand_sizes:
+        brands = make_brand_list(size)
+        dictionary = make_brand_dictionary(brands)
+        aliases, case_sensitive_aliases, exclusions = expand_brand_dictionary(brands, dictionary)
+
+        brand_variants = {brand: [brand] for brand in brands}
+        for variant, brand in aliases.items():
+            brand_variants[brand].append(variant)
+        corpus = make_corpus(list(aliases) + brands + exclusions, responses=responses)
+
+        start = time.perf_counter()
+        matcher = BrandMatcher(brands, aliases, case_sensitive_aliases, exclusions)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_results = [matcher.count(text) for text in corpus]
+        new_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        old_results = [legacy_count_variants(text, brand_variants) for text in corpus]
+        old_time = time.perf_counter() - start
+
+        new_total = sum(sum(r.values()) for r in new_results)
+        old_total = sum(sum(r.values()) for r in old_results)
+        print(f"   🔸 {size:>5} brands | {len(aliases) + len(brands) + len(exclusions):>6} variants")
+        print(f"      old loop: {old_time:8.3f}s   matcher: {new_time:8.3f}s "
+              f"(+{build_time:.3f}s build)   speedup: {old_time / new_time:6.1f}x")
+        print(f"      mentions counted: old {old_total} (overlaps double-counted, exclusions counted), "
+              f"matcher {new_total}")
+
+
+def _measure_allocations(build):
+    """Bytes still allocated after build() returns (its result is kept alive)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, kept
+
+
+def benchmark_storage(responses=100_000):
+    """Bytes per stored response: list of dicts vs the columnar ResponseStore"""
+    print(f"\n⏱️ BENCHMARK: processed response storage ({responses:,} responses)")
+    print("=" * 60)
+
+    brands = list(get_target_brands())
+    prompts = get_prompts()
+    rng = random.Random(3)
+    # response text is created up front so every layout is measured without it;
+    # only the store with keep_responses=False avoids holding it alive
+    texts = [f"response {i} " + "x" * rng.randint(200, 2000) for i in range(responses)]
+    counts = [{brand: rng.randint(0, 5) for brand in brands} for _ in range(responses)]
+    text_mb = sum(len(t) for t in texts) / 1e6
+
+    def build_dicts():
+        data = []
+        for i in range(responses):
+            data.append({
+                "timestamp": datetime.now().isoformat(),
+                "prompt": prompts[i % len(prompts)],
+                "response": texts[i],
+                "brand_mentions": dict(counts[i]),
+                "total_mentions": sum(counts[i].values())
+            })
+        return data
+
+    def build_store(keep_responses):
+        def build():
+            store = ResponseStore(brands, keep_responses=keep_responses)
+            for i in range(responses):
+                store.append(prompts[i % len(prompts)], texts[i], counts[i])
+            return store
+        return build
+
+    layouts = [
+        ("list of dicts (old)", build_dicts),
+        ("ResponseStore", build_store(True)),
+        ("ResponseStore, no text", build_store(False)),
+    ]
+
+    print(f"   (response text itself: {text_mb:.0f} MB, not included below)")
+    for name, build in layouts:
+        size, _ = _measure_allocations(build)
+        print(f"   🔸 {name:<24} {size / 1e6:8.1f} MB   {size / responses:7.1f} bytes/response")
+
+
+def make_filled_store(responses, num_brands, seed=5):
+    """ResponseStore with random counts, filled column-wise (skips per-row appends)"""
+    import numpy as np
+
+    brands = make_brand_list(num_brands)
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson(0.3, size=(responses, num_brands)).astype(np.uintc)
+
+    store = ResponseStore(brands, keep_responses=False)
+    store.prompts.append("benchmark prompt")
+    store.counts.frombytes(counts.tobytes())
+    store.totals.frombytes(counts.sum(axis=1, dtype=np.uintc).tobytes())
+    store.prompt_ids.frombytes(np.zeros(responses, dtype=np.uintc).tobytes())
+    store.response_lengths.frombytes(rng.integers(200, 4000, responses, dtype=np.uintc).tobytes())
+    store.timestamps.frombytes(np.zeros(responses, dtype=np.int64).tobytes())
+    return store
+
+
+def python_brand_analysis(store):
+    """Pure-Python per-brand loops, the way the analysis used to be computed"""
+    total_responses = len(store)
+    columns = {brand: store.brand_column(brand) for brand in store.brands}
+    totals = {brand: sum(column) for brand, column in columns.items()}
+    total_mentions = sum(totals.values())
+    brand_analysis = {}
+    for brand, column in columns.items():
+        responses_with_mentions = sum(1 for count in column if count > 0)
+        brand_analysis[brand] = {
+            "total_mentions": totals[brand],
+            "percentage": (totals[brand] / total_mentions * 100) if total_mentions > 0 else 0,
+            "avg_per_response": totals[brand] / total_responses,
+            "max_in_single_response": max(column),
+            "responses_with_mentions": responses_with_mentions,
+            "response_coverage": responses_with_mentions / total_responses * 100
+        }
+    return brand_analysis
+
+
+def benchmark_analytics(responses=1_000_000, num_brands=100):
+    """Pure-Python per-brand loops vs the vectorized NumPy backend"""
+    print(f"\n⏱️ BENCHMARK: comprehensive analysis ({responses:,} responses x {num_brands} brands)")
+    print("=" * 60)
+
+    if not numpy_available():
+        print("   ⚠️ NumPy not installed - skipping")
+        return
+
+    store = make_filled_store(responses, num_brands)
+
+    start = time.perf_counter()
+    python_result = python_brand_analysis(store)
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    numpy_result = vectorized_analysis(store)
+    numpy_time = time.perf_counter() - start
+
+    identical = python_result == numpy_result["brand_analysis"]
+    print(f"   🔸 pure Python brand stats:          {python_time:8.2f}s")
+    print(f"   🔸 NumPy brand stats + distribution: {numpy_time:8.2f}s   speedup: {python_time / numpy_time:6.1f}x")
+    print(f"      (NumPy also returns stddev and p50/p90/p99 per brand)")
+
+    start = time.perf_counter()
+    co_result = vectorized_analysis(store, co_occurrence=True)
+    co_time = time.perf_counter() - start
+    pairs = sum(len(row) for row in co_result["distribution_analysis"]["co_occurrence"].values())
+    print(f"   🔸 + opt-in co-occurrence:           {co_time:8.2f}s   ({pairs:,} non-zero brand pairs)")
+    print(f"      identical brand stats: {'✅' if identical else '❌'}")
+
+
+def _max_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 / 1024 ** 2 if sys.platform == "darwin" else 1 / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _processor_with_responses(responses):
+    import contextlib
+    import io
+    from data_processor import BrandMentionProcessor
+
+    brands = list(get_target_brands())
+    prompts = get_prompts()
+    rng = random.Random(9)
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = BrandMentionProcessor(analytics_backend="python")
+    for i in range(responses):
+        text = f"response {i} " + "lorem ipsum " * rng.randint(20, 150)
+        processor.record_result(prompts[i % len(prompts)], text, {b: rng.randint(0, 4) for b in brands})
+    return processor
+
+
+def _legacy_save_to_json(processor, filename):
+    """The original save: one big dict, one json.dump call"""
+    output = {
+        "analysis_timestamp": datetime.now().isoformat(),
+        "summary": processor.get_summary(),
+        "comprehensive_analysis": processor.get_comprehensive_analysis(),
+        "detailed_responses": list(processor.processed_data)
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+
+def _run_writer(mode, responses, filename, results):
+    import contextlib
+    import io
+
+    processor = _processor_with_responses(responses)
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "json.dump (old)":
+            _legacy_save_to_json(processor, filename)
+        elif mode == "streaming, indent=2":
+            processor.save_to_json(filename)
+        elif mode == "streaming, compact":
+            processor.save_to_json(filename, indent=None)
+        else:
+            processor.save_to_json(filename, jsonl_path=filename + "l")
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(filename) + (os.path.getsize(filename + "l") if os.path.exists(filename + "l") else 0)
+    results.put((elapsed, _max_rss_mb() - rss_before, size))
+
+
+def benchmark_writer(responses=100_000):
+    """Write time and extra peak RSS of save_to_json variants (each in a fresh process)"""
+    print(f"\n⏱️ BENCHMARK: save_to_json ({responses:,} responses)")
+    print("=" * 60)
+
+    import tempfile
+
+    modes = ["json.dump (old)", "streaming, indent=2", "streaming, compact", "JSONL + summary"]
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in modes:
+            filename = os.path.join(tmp, "results.json")
+            results = multiprocessing.Queue()
+            worker = multiprocessing.Process(target=_run_writer, args=(mode, responses, filename, results))
+            worker.start()
+            elapsed, extra_rss, size = results.get()
+            worker.join()
+            for path in (filename, filename + "l"):
+                if os.path.exists(path):
+                    os.remove(path)
+            print(f"   🔸 {mode:<22} {elapsed:6.2f}s   +{extra_rss:7.1f} MB peak RSS   {size / 1e6:7.1f} MB on disk")
+
+
+class _FakeElement:
+    """Stands in for a Selenium WebElement: every method is one driver round-trip"""
+
+    def __init__(self, driver, displayed):
+        self.driver = driver
+        self.displayed = displayed
+
+    def is_displayed(self):
+        return self.driver.execute("isElementDisplayed")["value"] and self.displayed
+
+    def is_enabled(self):
+        return self.driver.execute("isElementEnabled")["value"]
+
+
+class _FakeChatGPTDriver:
+    """
+    Minimal ChatGPT-like page: the hidden fallback textarea and the composer
+    div, a few visible icon buttons, and the send button further down the
+    selector list - roughly what the live page looks like.
+    """
+
+    current_url = "https://chat.openai.com/c/abc"
+
+    def __init__(self):
+        self.dom = {
+            "#prompt-textarea": [False],
+            "textarea[placeholder*='Message']": [],
+            "textarea[placeholder*='Send a message']": [],
+            "div[contenteditable='true']": [True],
+            "textarea": [False],
+            "button[data-testid='send-button']": [],
+            "button[aria-label*='Send']": [True],
+            "button svg": [True] * 12,
+            "*[role='button'] svg": [True] * 4,
+        }
+
+    def execute(self, driver_command, params=None):
+        return {"value": True}
+
+    def find_elements(self, by, selector):
+        self.execute("findElements")
+        return [_FakeElement(self, displayed) for displayed in self.dom.get(selector, [])]
+
+    def execute_script(self, script, *args):
+        self.execute("executeScript")
+        selectors, visible_only = args
+        for selector in selectors:
+            matches = self.dom.get(selector, [])
+            for displayed in matches:
+                if visible_only and not displayed:
+                    continue
+                return {"element": _FakeElement(self, displayed), "selector": selector,
+                        "count": len(matches), "href": self.current_url}
+        return {"element": None, "selector": None, "count": 0, "href": self.current_url}
+
+
+def _legacy_locate(driver, selectors):
+    """The original lookup loop: find_elements, then is_displayed / is_enabled per element"""
+    for selector in selectors:
+        for element in driver.find_elements("css selector", selector):
+            if element.is_displayed() and element.is_enabled():
+                return element
+    return None
+
+
+def benchmark_locators(prompts=100):
+    """WebDriver round-trips per prompt: selector-list loops vs the LocatorCache"""
+    print(f"\n🎯 LOCATOR BENCHMARK ({prompts} prompts, input + send button lookups)")
+
+    driver = _FakeChatGPTDriver()
+    counter = WebDriverCallCounter(driver)
+    for _ in range(prompts):
+        _legacy_locate(driver, INPUT_SELECTORS)
+        _legacy_locate(driver, SEND_BUTTON_SELECTORS)
+    legacy_calls = counter.calls / prompts
+
+    driver = _FakeChatGPTDriver()
+    counter = WebDriverCallCounter(driver)
+    locators = LocatorCache()
+    for _ in range(prompts):
+        locators.find(driver, "input", INPUT_SELECTORS)
+        locators.find(driver, "send_button", SEND_BUTTON_SELECTORS)
+    cached_calls = counter.calls / prompts
+
+    print(f"   🔸 selector loops   {legacy_calls:5.1f} WebDriver calls per prompt")
+    print(f"   🔸 LocatorCache     {cached_calls:5.1f} WebDriver calls per prompt")
+    for line in locators.summary():
+        print(f"      {line}")
+
+
+BENCHMARKS = {
+    "matcher": benchmark_matcher,
+    "aliases": benchmark_aliases,
+    "storage": benchmark_storage,
+    "analytics": benchmark_analytics,
+    "writer": benchmark_writer,
+    "locators": benchmark_locators,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+            continue
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
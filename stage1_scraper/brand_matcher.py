@@ -0,0 +1,321 @@
+"""
+BRAND MATCHER MODULE - single-pass brand counting for ChatGPT responses
+
+Instead of running one regex per brand over the text, all brand names are
+folded into a prefix trie and compiled into ONE regular expression. A single
+scan of the response then finds every brand, so the cost no longer grows with
+the size of the brand list.
+
+Word-boundary semantics match the old per-brand pattern (\\b<brand>\\b) and
+matching is case-insensitive. Brand names are still counted independently,
+like the old loop did: when one target brand overlaps another ("Nike" and
+"Nike Air", "New Balance" and "Balance Athletic") they go into separate
+tries, so "Nike Air Max" counts both Nike and Nike Air. Without overlapping
+names there is only one trie and one scan.
+
+Brands can also come with a dictionary of variants (prompts.BRAND_DICTIONARY):
+aliases and product lines count as the brand, case-sensitive aliases ("NB")
+only count in their exact casing, and exclusions ("Michael Jordan") are
+matched but not counted. Variants go into the same trie as their brand, so
+longest-match-wins settles overlaps between variants ("Air Jordan" is one
+Jordan mention, not a Jordan mention plus something else).
+"""
+
+import re
+from functools import lru_cache
+
+from prompts import get_brand_dictionary
+
+
+def _trie_to_regex(node):
+    """Turn a character trie into a regex string (longest alternatives first)"""
+    # '' key marks "a brand ends here"
+    ends_here = '' in node
+    branches = [re.escape(char) + _trie_to_regex(child)
+                for char, child in sorted(node.items()) if char != '']
+
+    if not branches:
+        return ''
+
+    if len(branches) == 1:
+        body = branches[0]
+    else:
+        body = '(?:' + '|'.join(branches) + ')'
+
+    # Optional tail = greedy, so the longer brand is tried first and the
+    # regex engine backtracks to the shorter one if \b fails
+    if ends_here:
+        return '(?:' + body + ')?'
+    return body
+
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def overlap_layers(brands):
+    """
+    Split brand names into layers where no two names in a layer overlap.
+
+    Two names overlap when one contains the other ("Nike" / "Nike Air") or
+    one ends where the other starts ("New Balance" / "Balance Athletic"):
+    in a shared trie the first match would swallow the other brand's
+    mention. Greedy colouring, so the usual case is a single layer.
+    Returns: list of brand lists, in input order
+    """
+    tokens = {brand: _TOKEN_RE.findall(brand.lower()) for brand in brands}
+    by_first_token = {}
+    for brand, brand_tokens in tokens.items():
+        if brand_tokens:
+            by_first_token.setdefault(brand_tokens[0], []).append(brand)
+
+    conflicts = {brand: set() for brand in tokens}
+    for brand, brand_tokens in tokens.items():
+        for i, token in enumerate(brand_tokens):
+            for other in by_first_token.get(token, ()):
+                if other == brand:
+                    continue
+                # other starts at token i: does it line up with the rest of brand?
+                n = min(len(brand_tokens) - i, len(tokens[other]))
+                if brand_tokens[i:i + n] == tokens[other][:n]:
+                    conflicts[brand].add(other)
+                    conflicts[other].add(brand)
+
+    layers = []
+    for brand in tokens:
+        for layer in layers:
+            if conflicts[brand].isdisjoint(layer):
+                layer.append(brand)
+                break
+        else:
+            layers.append([brand])
+    return layers
+
+
+def expand_brand_dictionary(brands, dictionary):
+    """
+    Flatten dictionary entries for brands into BrandMatcher arguments:
+    (aliases {variant: brand}, case_sensitive_aliases {variant: brand}, exclusions [phrase])
+    Product lines are added on their own and prefixed with every brand name / alias
+    (plain and possessive).
+    """
+    aliases = {}
+    case_sensitive_aliases = {}
+    exclusions = []
+    for brand in brands:
+        entry = dictionary.get(brand, {})
+        names = [brand] + list(entry.get("aliases", ())) + list(entry.get("case_sensitive_aliases", ()))
+        for alias in entry.get("aliases", ()):
+            aliases[alias] = brand
+        for alias in entry.get("case_sensitive_aliases", ()):
+            case_sensitive_aliases[alias] = brand
+        for product_line in entry.get("product_lines", ()):
+            aliases[product_line] = brand
+            for name in names:
+                # "Nike Pegasus" / "Nike's Pegasus" is one mention, not two
+                for prefix in (name, f"{name}'s", f"{name}\u2019s"):
+                    aliases[f"{prefix} {product_line}"] = brand
+        exclusions.extend(entry.get("exclude", ()))
+    return aliases, case_sensitive_aliases, exclusions
+
+
+class BrandMatcher:
+    """
+    Precompiled matcher that counts every target brand in one pass
+    (one pass per overlap layer when brand names overlap, see overlap_layers).
+
+    aliases / case_sensitive_aliases map extra names to a brand, exclusions
+    are phrases that contain a brand name but must not count as the brand.
+
+    Use get_matcher(brands) to reuse the compiled pattern for a brand set.
+    """
+
+    def __init__(self, brands, aliases=None, case_sensitive_aliases=None, exclusions=()):
+        self.brands = list(brands)
+
+        # lowercase name / alias -> canonical brand name
+        self._lookup = {}
+        # exact-case alias -> canonical brand name (only consulted when _lookup misses)
+        self._exact = dict(case_sensitive_aliases or {})
+
+        variants = [(brand, brand) for brand in self.brands] + list((aliases or {}).items())
+        for variant, brand in variants:
+            key = variant.lower()
+            if self._lookup.get(key, brand) != brand:
+                raise ValueError(f"'{variant}' is listed for both {self._lookup[key]} and {brand}")
+            self._lookup[key] = brand
+
+        for alias in self._exact:
+            if alias.lower() in self._lookup:
+                raise ValueError(f"case-sensitive alias '{alias}' clashes with another brand name")
+        exclusion_keys = set()
+        for phrase in exclusions:
+            if phrase.lower() in self._lookup:
+                raise ValueError(f"'{phrase}' is both a brand variant and an exclusion")
+            # matched (so it beats the shorter brand name inside it) but never counted
+            exclusion_keys.add(phrase.lower())
+
+        # each layer's trie holds its brands, their variants and every exclusion
+        layer_of = {}
+        self.layers = overlap_layers(self.brands)
+        for index, layer in enumerate(self.layers):
+            layer_of.update(dict.fromkeys(layer, index))
+        layer_keys = [set(exclusion_keys) for _ in self.layers]
+        for key, brand in self._lookup.items():
+            layer_keys[layer_of[brand]].add(key)
+        for alias, brand in self._exact.items():
+            layer_keys[layer_of[brand]].add(alias.lower())
+
+        self.max_brand_length = max((len(key) for keys in layer_keys for key in keys), default=0)
+        self.patterns = [self._compile(keys) for keys in layer_keys if keys]
+
+    @staticmethod
+    def _compile(keys):
+        trie = {}
+        for key in keys:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        return re.compile(r'\b' + _trie_to_regex(trie) + r'\b', re.IGNORECASE)
+
+    def _brand_for(self, matched):
+        """Canonical brand for a matched string, None for exclusions / wrong casing"""
+        brand = self._lookup.get(matched.lower())
+        if brand is None:
+            brand = self._exact.get(matched)
+        return brand
+
+    def count(self, text):
+        """
+        Count brand mentions in a single scan of the text.
+        Returns: dict: {"Nike": 2, "Adidas": 1, ...}
+        """
+        counts = dict.fromkeys(self.brands, 0)
+        lookup = self._lookup
+        exact = self._exact
+        for pattern in self.patterns:
+            for match in pattern.finditer(text):
+                matched = match.group()
+                brand = lookup.get(matched.lower())
+                if brand is None:
+                    brand = exact.get(matched)  # exclusion or wrongly-cased alias -> None
+                    if brand is None:
+                        continue
+                counts[brand] += 1
+
+        return counts
+
+    def count_stream(self, chunks):
+        """
+        Count brand mentions in text that arrives as an iterator of chunks
+        (file reader, socket, DOM text stream...).
+
+        Only a short tail of unscanned text is carried between chunks, so
+        memory stays bounded by chunk size no matter how long the stream is,
+        and brands split across chunks ("New " | "Balance") still count.
+        """
+        counts = dict.fromkeys(self.brands, 0)
+        brand_for = self._brand_for
+        # a match starting before len(buffer) - lookahead can't change when more text arrives
+        lookahead = self.max_brand_length + 1
+        # per pattern: [buffer, pos], buffer[:pos] is already scanned, kept only as \b context
+        states = [['', 0] for _ in self.patterns]
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            for pattern, state in zip(self.patterns, states):
+                buffer, pos = state
+                buffer += chunk
+                limit = len(buffer) - lookahead
+                if limit <= pos:
+                    state[0] = buffer
+                    continue
+
+                next_pos = limit
+                for match in pattern.finditer(buffer, pos):
+                    if match.start() >= limit:
+                        break
+                    brand = brand_for(match.group())
+                    if brand is not None:
+                        counts[brand] += 1
+                    next_pos = max(limit, match.end())
+
+                # keep one already-scanned char so \b still sees the left context
+                state[0] = buffer[next_pos - 1:]
+                state[1] = 1
+
+        for pattern, (buffer, pos) in zip(self.patterns, states):
+            for match in pattern.finditer(buffer, pos):
+                brand = brand_for(match.group())
+                if brand is not None:
+                    counts[brand] += 1
+
+        return counts
+
+
+def iter_file_chunks(file_obj, chunk_size=64 * 1024):
+    """Yield text chunks from an open file without reading it all into memory"""
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(brands, use_dictionary):
+    if not use_dictionary:
+        return BrandMatcher(brands)
+    aliases, case_sensitive_aliases, exclusions = expand_brand_dictionary(brands, get_brand_dictionary())
+    return BrandMatcher(brands, aliases, case_sensitive_aliases, exclusions)
+
+
+def get_matcher(brands, use_dictionary=True):
+    """
+    Return a compiled matcher for this brand set (built once, then cached).
+    By default the aliases / product lines / exclusions from the brand
+    dictionary are included; use_dictionary=False matches exact names only.
+    """
+    return _cached_matcher(tuple(brands), use_dictionary)
+
+
+def test_brand_dictionary():
+    """Quick self-check of alias, product line and exclusion handling"""
+    print("🧪 Testing brand dictionary matching...")
+    matcher = get_matcher(["Nike", "Adidas", "Hoka", "New Balance", "Jordan"])
+    cases = [
+        ("Air Jordan 1s are classics, and Jordan Brand keeps releasing them", {"Jordan": 2}),
+        ("Michael Jordan wore Air Jordans? No - Michael Jordan wore Air Jordan 1", {"Jordan": 1}),
+        ("HOKA ONE ONE Clifton vs Hoka Bondi", {"Hoka": 2}),
+        ("NB Fresh Foam and the New Balance 990, nb is not a brand", {"New Balance": 2}),
+        ("adidas Originals Stan Smith and Nike's Pegasus", {"Adidas": 1, "Nike": 1}),
+    ]
+    for text, expected in cases:
+        counts = {brand: count for brand, count in matcher.count(text).items() if count}
+        assert counts == expected, f"{text!r}: {counts} != {expected}"
+        assert matcher.count_stream(iter(text)) == matcher.count(text)
+        print(f"   ✅ {text[:50]!r} -> {counts}")
+    print("✅ Brand dictionary test passed")
+
+
+def test_overlapping_brands():
+    """Overlapping target brands are counted independently, like the old per-brand loop"""
+    print("🧪 Testing overlapping brand names...")
+    matcher = get_matcher(["Nike", "Nike Air", "New Balance", "Balance Athletic"], use_dictionary=False)
+    cases = [
+        ("Nike Air Max", {"Nike": 1, "Nike Air": 1}),
+        ("Nike, Nike Air and nike air", {"Nike": 3, "Nike Air": 2}),
+        ("New Balance Athletic Shoe", {"New Balance": 1, "Balance Athletic": 1}),
+    ]
+    for text, expected in cases:
+        counts = {brand: count for brand, count in matcher.count(text).items() if count}
+        assert counts == expected, f"{text!r}: {counts} != {expected}"
+        assert matcher.count_stream(iter(text)) == matcher.count(text)
+        print(f"   ✅ {text!r} -> {counts}")
+    print("✅ Overlapping brands test passed")
+
+
+if __name__ == "__main__":
+    test_brand_dictionary()
+    test_overlapping_brands()
@@ -0,0 +1,306 @@
+"""
+CDP DRIVER MODULE - asyncio ChatGPT driver over the Chrome DevTools Protocol
+
+GPT_scraper.py drives the browser through blocking Selenium calls, so one
+process can only work one prompt at a time. This driver talks to the same
+--remote-debugging-port session directly over CDP websockets:
+
+1. one websocket per tab, all multiplexed on a single asyncio event loop
+2. prompts are entered with Input.insertText (one round-trip, no send_keys)
+3. completion is awaited, not polled: a MutationObserver promise in the page
+   (chatgpt_page.WAIT_FOR_COMPLETION_JS) resolves when the answer is done
+4. while one tab waits for its answer the others are typing or extracting
+
+Answers go through the usual BrandMentionProcessor.process_response (and the
+checkpoint log). Everything runs on one thread, so no locking is needed.
+
+Usage (Chrome already running with --remote-debugging-port and logged in):
+    python cdp_driver.py --tabs 4 [--port 9222] [--checkpoint run.jsonl]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+import requests
+import websockets
+
+from prompts import get_prompts, known_prompt_count, select_prompts
+from data_processor import BrandMentionProcessor
+from checkpoint import open_checkpoint
+from chatgpt_page import (
+    ASSISTANT_TURN_SELECTOR, STOP_BUTTON_SELECTOR, SEND_BUTTON_SELECTOR, INPUT_SELECTORS,
+    FOCUS_INPUT_JS, INPUT_EMPTY_JS, CLICK_SEND_JS, WAIT_FOR_COMPLETION_JS
+)
+
+CHATGPT_URL = "https://chat.openai.com"
+CHATGPT_HOSTS = ("chat.openai.com", "chatgpt.com")
+
+
+class CDPError(Exception):
+    """Error returned by the browser for a CDP command"""
+
+
+class CDPSession:
+    """
+    One websocket connection to one tab. Commands are matched to replies by
+    id, so many commands can be in flight on the same connection.
+    """
+
+    def __init__(self, websocket_url):
+        self.websocket_url = websocket_url
+        self.websocket = None
+        self._ids = itertools.count(1)
+        self._pending = {}  # command id -> future
+        self._reader = None
+
+    async def connect(self):
+        # max_size=None: a long answer can be bigger than the default 1 MB frame limit
+        self.websocket = await websockets.connect(self.websocket_url, max_size=None)
+        self._reader = asyncio.create_task(self._read_messages())
+        return self
+
+    async def _read_messages(self):
+        try:
+            async for message in self.websocket:
+                reply = json.loads(message)
+                future = self._pending.pop(reply.get("id"), None)
+                if future is None or future.done():
+                    continue  # an event, we don't subscribe to any
+                if "error" in reply:
+                    future.set_exception(CDPError(reply["error"].get("message", reply["error"])))
+                else:
+                    future.set_result(reply.get("result", {}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(CDPError("tab connection closed"))
+            self._pending.clear()
+
+    async def send(self, method, params=None):
+        command_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        await self.websocket.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+        return await future
+
+    async def call_js(self, script, *args, await_promise=False):
+        """Run a chatgpt_page snippet (function body using arguments[...]) and return its value"""
+        expression = f"(function () {{{script}}}).apply(null, {json.dumps(args)})"
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "awaitPromise": await_promise,
+            "returnByValue": True
+        })
+        if "exceptionDetails" in result:
+            raise CDPError(result["exceptionDetails"].get("text", "script error"))
+        return result["result"].get("value")
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+        if self._reader is not None:
+            await self._reader
+
+
+def list_chatgpt_tabs(port):
+    """Websocket URLs of the open ChatGPT tabs on a debug port"""
+    targets = requests.get(f"http://localhost:{port}/json", timeout=5).json()
+    return [
+        target["webSocketDebuggerUrl"] for target in targets
+        if target.get("type") == "page" and any(host in target.get("url", "") for host in CHATGPT_HOSTS)
+    ]
+
+
+def open_chatgpt_tab(port):
+    """Open a new ChatGPT tab and return its websocket URL"""
+    target = requests.put(f"http://localhost:{port}/json/new?{CHATGPT_URL}", timeout=5).json()
+    return target["webSocketDebuggerUrl"]
+
+
+class AsyncChatGPTDriver:
+    """
+    Scrapes prompts in several ChatGPT tabs of one Chrome session at once
+    """
+
+    def __init__(self, port=9222, tabs=2, processor=None, response_timeout=180, stable_ms=1500,
+                 checkpoint_file=None, delay=1):
+        self.port = port
+        self.tabs = tabs
+        self.processor = processor or BrandMentionProcessor()
+        self.response_timeout = response_timeout
+        self.stable_ms = stable_ms
+        self.checkpoint_file = checkpoint_file
+        self.delay = delay  # pause per tab between prompts
+        self.sessions = []
+        self.failed_prompts = []
+        self.prompts_started = 0
+
+        print(f" CDP CHATGPT DRIVER: {tabs} tabs on port {port}")
+
+    async def connect(self):
+        """Attach to the existing ChatGPT tabs, opening more if needed"""
+        websocket_urls = await asyncio.to_thread(list_chatgpt_tabs, self.port)
+        while len(websocket_urls) < self.tabs:
+            websocket_urls.append(await asyncio.to_thread(open_chatgpt_tab, self.port))
+
+        for websocket_url in websocket_urls[:self.tabs]:
+            session = await CDPSession(websocket_url).connect()
+            # Background tabs must keep running timers and accept input like a focused one
+            await session.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+            await session.send("Page.setWebLifecycleState", {"state": "active"})
+            self.sessions.append(session)
+
+        print(f"   ✅ Connected to {len(self.sessions)} tabs")
+        return len(self.sessions)
+
+    async def submit_prompt(self, session, prompt):
+        """Type and send one prompt. Returns the number of answers before it, or None"""
+        if not await session.call_js(FOCUS_INPUT_JS, list(INPUT_SELECTORS)):
+            print("   ❌ No input found")
+            return None
+
+        previous_turns = await session.call_js(
+            "return document.querySelectorAll(arguments[0]).length;", ASSISTANT_TURN_SELECTOR
+        )
+        await session.send("Input.insertText", {"text": prompt})
+
+        enter = {"key": "Enter", "code": "Enter", "windowsVirtualKeyCode": 13}
+        await session.send("Input.dispatchKeyEvent", {"type": "keyDown", "text": "\r", **enter})
+        await session.send("Input.dispatchKeyEvent", {"type": "keyUp", **enter})
+
+        await asyncio.sleep(0.5)
+        if not await session.call_js(INPUT_EMPTY_JS):
+            # Enter didn't send it - try the send button
+            if not await session.call_js(CLICK_SEND_JS, SEND_BUTTON_SELECTOR):
+                print("   ❌ Submission failed")
+                return None
+        return previous_turns
+
+    async def wait_for_response(self, session, previous_turns):
+        """Await the page-side completion promise and return the answer text"""
+        outcome = await asyncio.wait_for(
+            session.call_js(
+                WAIT_FOR_COMPLETION_JS,
+                previous_turns,
+                self.stable_ms,
+                self.response_timeout * 1000,
+                ASSISTANT_TURN_SELECTOR,
+                STOP_BUTTON_SELECTOR,
+                await_promise=True
+            ),
+            timeout=self.response_timeout + 30
+        )
+        if outcome["text"] and not outcome["complete"]:
+            print(f"   ⚠️ Response still changing after {self.response_timeout}s - taking what is there")
+        return outcome["text"]
+
+    async def _tab_worker(self, tab_number, session, source):
+        # Each free tab takes the next prompt straight from the (lazy) source.
+        # One thread, so the shared iterator needs no lock.
+        for prompt in source:
+            self.prompts_started += 1
+
+            print(f"\n📝 [tab {tab_number}] {prompt[:60]}...")
+            try:
+                previous_turns = await self.submit_prompt(session, prompt)
+                response = None
+                if previous_turns is not None:
+                    response = await self.wait_for_response(session, previous_turns)
+            except (CDPError, asyncio.TimeoutError, websockets.ConnectionClosed) as e:
+                print(f"   ⚠️ [tab {tab_number}] {type(e).__name__}: {e}")
+                response = None
+
+            if response:
+                result = self.processor.process_response(prompt, response)
+                print(f"   📊 [tab {tab_number}] Brands found: {result['brand_mentions']}")
+            else:
+                self.failed_prompts.append(prompt)
+
+            await asyncio.sleep(self.delay)
+
+    async def run(self, prompts=None):
+        """Scrape every prompt across the tabs and return the processor"""
+        if not self.sessions and not await self.connect():
+            print("❌ No ChatGPT tabs to drive")
+            return self.processor
+
+        # Iterated lazily: a big PromptCatalog is never loaded into memory
+        prompts = prompts if prompts is not None else get_prompts()
+        total_prompts = known_prompt_count(prompts)
+
+        resume = bool(self.checkpoint_file) and os.path.exists(self.checkpoint_file)
+        checkpoint_file = self.checkpoint_file or f"brand_mentions_results_{int(time.time())}.jsonl"
+        completed_prompts = open_checkpoint(self.processor, checkpoint_file, resume=resume)
+        self.checkpoint_file = checkpoint_file
+        print(f"📝 Checkpoint log: {checkpoint_file}")
+
+        if completed_prompts:
+            prompts = (prompt for prompt in prompts if prompt not in completed_prompts)
+            total_prompts = None
+            print(f"⏭️ Resuming: skipping {len(completed_prompts)} completed prompts")
+
+        source = iter(prompts)
+        self.prompts_started = 0
+
+        scope = f"{total_prompts} prompts" if total_prompts is not None else "prompts"
+        print(f"\n🚀 Scraping {scope} across {len(self.sessions)} tabs...")
+        start_time = time.time()
+        try:
+            await asyncio.gather(*(
+                self._tab_worker(number, session, source)
+                for number, session in enumerate(self.sessions, 1)
+            ))
+        finally:
+            self.processor.response_writer.close()
+
+        total_time = time.time() - start_time
+        completed = self.prompts_started - len(self.failed_prompts)
+        print(f"\n🎉 CDP SCRAPING COMPLETE!")
+        print(f"   ✅ Success rate: {completed}/{self.prompts_started}")
+        print(f"   ⏱️ Total time: {total_time:.1f}s ({total_time/60:.1f} minutes)")
+        print(f"   📈 Throughput: {completed / max(total_time, 1e-9) * 60:.1f} prompts/minute")
+
+        if self.processor.processed_data:
+            self.processor.print_detailed_summary()
+            filename = os.path.splitext(checkpoint_file)[0] + ".json"
+            self.processor.save_to_json(filename)
+            print(f"💾 Saved: {filename}")
+
+        return self.processor
+
+    async def close(self):
+        for session in self.sessions:
+            await session.close()
+        self.sessions = []
+
+
+async def scrape(port=9222, tabs=2, checkpoint_file=None, prompts=None):
+    driver = AsyncChatGPTDriver(port=port, tabs=tabs, checkpoint_file=checkpoint_file)
+    try:
+        return await driver.run(prompts)
+    finally:
+        await driver.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape ChatGPT brand mentions over CDP in several tabs")
+    parser.add_argument("--port", type=int, default=9222, help="Chrome remote debugging port")
+    parser.add_argument("--tabs", type=int, default=2, help="ChatGPT tabs to drive at once")
+    parser.add_argument("--checkpoint", default=None, help=".jsonl checkpoint log to resume from")
+    parser.add_argument("--catalog", action="store_true", help="use the full prompt catalog (templates expanded)")
+    parser.add_argument("--prompt-file", action="append", default=[], help="extra .txt/.jsonl prompt file (implies --catalog)")
+    parser.add_argument("--shard", default=None, help="only this machine's share of the catalog, e.g. 0/4")
+    args = parser.parse_args()
+
+    prompts = select_prompts(args.catalog, args.prompt_file, args.shard)
+    asyncio.run(scrape(port=args.port, tabs=args.tabs, checkpoint_file=args.checkpoint, prompts=prompts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+"""
+CHATGPT PAGE MODULE - injected JavaScript helpers for the ChatGPT web UI
+
+Instead of sleeping a fixed 10-15 seconds and then grabbing the first long
+element, the scrapers install a MutationObserver in the page and poll one
+small status object via execute_script. A response counts as complete as
+soon as:
+
+1. a new assistant message has appeared,
+2. the "stop generating" button is gone, and
+3. the DOM has been quiet (and the text unchanged) for stable_ms.
+
+Short answers return in a couple of seconds; long answers are never cut off
+by a fixed timer.
+
+Prompt input can also skip per-character send_keys: insert_prompt_text sets
+the whole prompt in one execute_script call ("fast") or as a synthetic paste
+event ("paste").
+
+The snippets are plain function bodies reading arguments[...], so the CDP
+driver (cdp_driver.py) runs the same ones through Runtime.evaluate.
+
+Once an answer is complete, extract_last_response fetches its text, a
+markdown rendering and its streaming state in a single call.
+
+Element lookups go through LocatorCache: every candidate selector is tried
+inside the page in one execute_script call (instead of find_elements plus
+is_displayed / is_enabled per element), and the selector that won last time
+on this kind of page is tried first. WebDriverCallCounter counts the
+round-trips so the savings show up in the run summary.
+"""
+
+import time
+from collections import Counter, namedtuple
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+ASSISTANT_TURN_SELECTOR = "div[data-message-author-role='assistant']"
+STOP_BUTTON_SELECTOR = "button[data-testid='stop-button'], button[aria-label*='Stop']"
+SEND_BUTTON_SELECTOR = "button[data-testid='send-button'], button[aria-label*='Send']"
+SEND_BUTTON_SELECTORS = (
+    "button[data-testid='send-button']",
+    "button[aria-label*='Send']",
+    "button svg",
+    "*[role='button'] svg"
+)
+RESPONSE_SELECTORS = (
+    ASSISTANT_TURN_SELECTOR,
+    "div[data-testid*='conversation-turn'] .markdown",
+    ".markdown",
+    "div.prose"
+)
+INPUT_SELECTORS = (
+    "#prompt-textarea",
+    "textarea[placeholder*='Message']",
+    "textarea[placeholder*='Send a message']",
+    "div[contenteditable='true']",
+    "textarea"
+)
+
+# Records the time of the last DOM mutation in window.__bearLastMutation (installed once per page)
+INSTALL_OBSERVER_JS = """
+if (!window.__bearObserver) {
+    window.__bearLastMutation = performance.now();
+    window.__bearObserver = new MutationObserver(function () {
+        window.__bearLastMutation = performance.now();
+    });
+    window.__bearObserver.observe(document.body, {childList: true, subtree: true, characterData: true});
+}
+return true;
+"""
+
+# Small status object: no full text transfer while the answer is still streaming
+RESPONSE_STATE_JS = """
+const turns = document.querySelectorAll(arguments[0]);
+const last = turns.length ? turns[turns.length - 1] : null;
+const text = last ? last.innerText : '';
+return {
+    turns: turns.length,
+    length: text.length,
+    tail: text.slice(-200),
+    streaming: !!document.querySelector(arguments[1]),
+    quiet_ms: window.__bearLastMutation === undefined ? 0 : performance.now() - window.__bearLastMutation
+};
+"""
+
+# Everything about the last answer in one round-trip: plain text, a markdown rendering
+# of its DOM (headings, lists, code, tables, links) with element counts, and the
+# streaming state. Returns null when no selector matches.
+EXTRACT_RESPONSE_JS = """
+const [selectors, stopSelector] = arguments;
+let turns = [], selector = null;
+for (const candidate of selectors) {
+    const matches = document.querySelectorAll(candidate);
+    if (matches.length) { turns = matches; selector = candidate; break; }
+}
+if (!turns.length) { return null; }
+const last = turns[turns.length - 1];
+const structure = {headings: 0, paragraphs: 0, list_items: 0, code_blocks: 0, tables: 0, links: 0, emphasis: 0};
+const markdown = [];
+
+function inline(node, skipLists) {
+    let out = '';
+    for (const child of node.childNodes) {
+        if (child.nodeType === 3) { out += child.textContent; continue; }
+        if (child.nodeType !== 1) { continue; }
+        const tag = child.tagName;
+        if (skipLists && (tag === 'UL' || tag === 'OL')) { continue; }
+        if (tag === 'STRONG' || tag === 'B') { structure.emphasis++; out += '**' + inline(child) + '**'; }
+        else if (tag === 'EM' || tag === 'I') { structure.emphasis++; out += '*' + inline(child) + '*'; }
+        else if (tag === 'CODE') { out += '`' + child.textContent + '`'; }
+        else if (tag === 'A') { structure.links++; out += '[' + inline(child) + '](' + child.getAttribute('href') + ')'; }
+        else if (tag === 'BR') { out += '\\n'; }
+        else { out += inline(child, skipLists); }
+    }
+    return out;
+}
+
+function listLines(list, depth) {
+    const lines = [];
+    let number = 1;
+    for (const item of list.children) {
+        if (item.tagName !== 'LI') { continue; }
+        structure.list_items++;
+        const marker = list.tagName === 'OL' ? (number++) + '.' : '-';
+        lines.push('  '.repeat(depth) + marker + ' ' + inline(item, true).trim());
+        for (const sub of item.children) {
+            if (sub.tagName === 'UL' || sub.tagName === 'OL') { lines.push(...listLines(sub, depth + 1)); }
+        }
+    }
+    return lines;
+}
+
+function blocks(children) {
+    for (const child of children) {
+        const tag = child.tagName;
+        if (/^H[1-6]$/.test(tag)) {
+            structure.headings++;
+            markdown.push('#'.repeat(Number(tag[1])) + ' ' + inline(child).trim());
+        } else if (tag === 'P') {
+            structure.paragraphs++;
+            markdown.push(inline(child).trim());
+        } else if (tag === 'UL' || tag === 'OL') {
+            markdown.push(listLines(child, 0).join('\\n'));
+        } else if (tag === 'PRE') {
+            structure.code_blocks++;
+            markdown.push('```\\n' + child.textContent.trim() + '\\n```');
+        } else if (tag === 'TABLE') {
+            structure.tables++;
+            const rows = Array.from(child.querySelectorAll('tr')).map(
+                row => '| ' + Array.from(row.children).map(cell => inline(cell).trim()).join(' | ') + ' |'
+            );
+            if (rows.length) {
+                rows.splice(1, 0, '|' + ' --- |'.repeat(rows[0].split(' | ').length));
+            }
+            markdown.push(rows.join('\\n'));
+        } else if (tag === 'BLOCKQUOTE') {
+            markdown.push('> ' + inline(child).trim());
+        } else if (tag === 'HR') {
+            markdown.push('---');
+        } else if (child.children.length) {
+            blocks(child.children);  // wrapper div
+        } else if (child.textContent.trim()) {
+            markdown.push(child.textContent.trim());
+        }
+    }
+}
+
+blocks(last.children);
+return {
+    text: last.innerText.trim(),
+    markdown: markdown.filter(part => part).join('\\n\\n'),
+    structure: structure,
+    selector: selector,
+    turns: turns.length,
+    streaming: !!document.querySelector(stopSelector),
+    quiet_ms: window.__bearLastMutation === undefined ? null : performance.now() - window.__bearLastMutation
+};
+"""
+
+# Clear the input and insert the prompt in one call. Works for the textarea and for
+# the contenteditable (ProseMirror) composer. Returns the text now in the input.
+FAST_INPUT_JS = """
+const el = arguments[0], text = arguments[1];
+el.focus();
+if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') {
+    const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+    setter.call(el, text);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    return el.value;
+}
+document.execCommand('selectAll', false, null);
+document.execCommand('insertText', false, text);
+return el.innerText;
+"""
+
+# Same, but delivered as a paste event (what the editor sees when a user hits Cmd+V)
+PASTE_INPUT_JS = """
+const el = arguments[0], text = arguments[1];
+el.focus();
+if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') {
+    el.select();
+} else {
+    document.execCommand('selectAll', false, null);
+}
+const data = new DataTransfer();
+data.setData('text/plain', text);
+el.dispatchEvent(new ClipboardEvent('paste', {clipboardData: data, bubbles: true, cancelable: true}));
+if ((el.value !== undefined ? el.value : el.innerText).trim() !== text.trim()) {
+    // synthetic paste events are ignored by plain textareas - set the value instead
+    if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') {
+        const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+        setter.call(el, text);
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+    }
+}
+return el.value !== undefined ? el.value : el.innerText;
+"""
+
+# Text currently in an input (textarea value or contenteditable text)
+INPUT_TEXT_JS = """
+const el = arguments[0];
+return el.value !== undefined ? el.value : el.innerText;
+"""
+
+SELECT_INPUT_JS = """
+const el = arguments[0];
+el.focus();
+if (el.select) { el.select(); } else { document.execCommand('selectAll', false, null); }
+"""
+
+# Focus the first visible input (selectors in priority order) and select its contents
+FOCUS_INPUT_JS = """
+const selectors = arguments[0];
+for (const selector of selectors) {
+    for (const el of document.querySelectorAll(selector)) {
+        if (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length) || el.disabled) { continue; }
+        el.focus();
+        if (el.select) { el.select(); } else { document.execCommand('selectAll', false, null); }
+        return selector;
+    }
+}
+return null;
+"""
+
+# True once the input is empty again (i.e. the prompt was sent)
+INPUT_EMPTY_JS = """
+const el = document.activeElement;
+if (!el) { return true; }
+return ((el.value !== undefined ? el.value : el.innerText) || '').trim() === '';
+"""
+
+CLICK_SEND_JS = """
+const button = document.querySelector(arguments[0]);
+if (!button || button.disabled) { return false; }
+button.click();
+return true;
+"""
+
+# Event-driven version of _ResponseComplete: returns a Promise that resolves with
+# {text, complete} once a new assistant turn exists, the stop button is gone and no
+# DOM mutation has happened for stableMs. Every mutation re-arms the quiet timer, so
+# nothing polls. complete is false if timeoutMs passed first.
+# check() runs on every streamed token, so it only counts turns and looks for the stop
+# button; innerText (which forces layout) is read once the answer has gone quiet.
+WAIT_FOR_COMPLETION_JS = """
+const [previousTurns, stableMs, timeoutMs, turnSelector, stopSelector] = arguments;
+return new Promise(function (resolve) {
+    let quietTimer = null;
+    function lastTurnText() {
+        const turns = document.querySelectorAll(turnSelector);
+        return turns.length > previousTurns ? turns[turns.length - 1].innerText.trim() : null;
+    }
+    function finish(complete) {
+        const text = lastTurnText();
+        if (complete && !text) { return; }  // new turn still empty - wait for more mutations
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve({text: text, complete: complete});
+    }
+    function check() {
+        clearTimeout(quietTimer);
+        if (document.querySelectorAll(turnSelector).length <= previousTurns
+                || document.querySelector(stopSelector)) { return; }
+        quietTimer = setTimeout(function () { finish(true); }, stableMs);
+    }
+    const observer = new MutationObserver(check);
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    const deadline = setTimeout(function () { finish(false); }, timeoutMs);
+    check();
+});
+"""
+
+# First element matching any selector (in order), plus which selector matched, how many
+# elements it matched and the page URL - all in one round-trip
+FIND_ELEMENT_JS = """
+const [selectors, visibleOnly] = arguments;
+for (const selector of selectors) {
+    const matches = document.querySelectorAll(selector);
+    for (const el of matches) {
+        if (visibleOnly && (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length) || el.disabled)) {
+            continue;
+        }
+        return {element: el, selector: selector, count: matches.length, href: location.href};
+    }
+}
+return {element: null, selector: null, count: 0, href: location.href};
+"""
+
+INPUT_MODES = ("fast", "paste", "human")
+
+Located = namedtuple("Located", "element selector count")
+
+
+def page_type_for(url):
+    """Rough ChatGPT page kind - the same element can use different markup on each"""
+    path = urlparse(url or "").path
+    if path.startswith("/c/"):
+        return "conversation"
+    if path.startswith("/g/"):
+        return "gpt"
+    if path in ("", "/"):
+        return "home"
+    return "other"
+
+
+class LocatorCache:
+    """
+    Remembers which selector found each element role (input, send button,
+    response) per page type, and tries it first next time. A cached selector
+    is dropped when it stops matching or when the caller reports the element
+    didn't work; moving to another page type uses that page's own entries.
+    """
+
+    def __init__(self):
+        self.winners = {}  # (page_type, role) -> selector that matched last time
+        self.page_type = None
+        self.stats = {}  # role -> {"hits", "misses", "invalidations"}
+
+    def _role_stats(self, role):
+        if role not in self.stats:
+            self.stats[role] = {"hits": 0, "misses": 0, "invalidations": 0}
+        return self.stats[role]
+
+    def find(self, driver, role, selectors, visible_only=True):
+        """Locate an element for role with one execute_script call. Returns a Located"""
+        cached = self.winners.get((self.page_type, role))
+        ordered = list(selectors)
+        if cached:
+            ordered = [cached] + [selector for selector in selectors if selector != cached]
+
+        found = driver.execute_script(FIND_ELEMENT_JS, ordered, visible_only)
+
+        page_type = page_type_for(found["href"])
+        if page_type != self.page_type:
+            # navigated since the last lookup - judge the result against that page's cache
+            self.page_type = page_type
+            cached = self.winners.get((page_type, role))
+
+        stats = self._role_stats(role)
+        key = (page_type, role)
+        if cached and found["selector"] == cached:
+            stats["hits"] += 1
+        else:
+            stats["misses"] += 1
+            if cached:
+                stats["invalidations"] += 1
+                del self.winners[key]
+            if found["selector"]:
+                self.winners[key] = found["selector"]
+
+        return Located(found["element"], found["selector"], found["count"])
+
+    def invalidate(self, role):
+        """The located element didn't work (stale, not clickable...) - forget its selector"""
+        if self.winners.pop((self.page_type, role), None) is not None:
+            self._role_stats(role)["invalidations"] += 1
+
+    def summary(self):
+        lines = []
+        for role, stats in sorted(self.stats.items()):
+            lookups = stats["hits"] + stats["misses"]
+            hit_rate = stats["hits"] / lookups * 100 if lookups else 0
+            lines.append(f"{role}: {stats['hits']}/{lookups} cache hits ({hit_rate:.0f}%), "
+                         f"{stats['invalidations']} invalidations")
+        return lines
+
+
+class WebDriverCallCounter:
+    """
+    Counts WebDriver commands (one HTTP round-trip each) sent by a driver.
+    Element methods like is_displayed() go through driver.execute too, so
+    every call is counted.
+    """
+
+    def __init__(self, driver):
+        self.calls = 0
+        self.commands = Counter()
+        original_execute = driver.execute
+
+        def counting_execute(driver_command, params=None):
+            self.calls += 1
+            self.commands[driver_command] += 1
+            return original_execute(driver_command, params)
+
+        driver.execute = counting_execute
+
+
+def insert_prompt_text(driver, element, text, mode="fast"):
+    """
+    Put the whole prompt into the input with a single WebDriver round-trip.
+    Falls back to the CDP Input.insertText command if the page didn't take it.
+    Returns True when the input holds the prompt, False if neither worked
+    (the caller should type it instead).
+    """
+    script = PASTE_INPUT_JS if mode == "paste" else FAST_INPUT_JS
+    current = driver.execute_script(script, element, text) or ""
+    if current.strip() == text.strip():
+        return True
+
+    # Input.insertText replaces the focused selection, like an IME commit
+    driver.execute_script(SELECT_INPUT_JS, element)
+    driver.execute_cdp_cmd("Input.insertText", {"text": text})
+    current = driver.execute_script(INPUT_TEXT_JS, element) or ""
+    return current.strip() == text.strip()
+
+
+def install_mutation_observer(driver):
+    driver.execute_script(INSTALL_OBSERVER_JS)
+
+
+def count_assistant_turns(driver, turn_selector=ASSISTANT_TURN_SELECTOR):
+    """Number of assistant messages on the page (call before submitting a prompt)"""
+    try:
+        return driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length;", turn_selector
+        )
+    except WebDriverException:
+        return 0
+
+
+def extract_last_response(driver, selectors=RESPONSE_SELECTORS):
+    """
+    Text, markdown and status of the last assistant answer in one execute_script
+    call (no full-page text transfer). Returns a dict or None if there's no answer:
+    {"text", "markdown", "structure", "selector", "turns", "streaming", "quiet_ms"}
+    """
+    return driver.execute_script(EXTRACT_RESPONSE_JS, list(selectors), STOP_BUTTON_SELECTOR)
+
+
+class _ResponseComplete:
+    """WebDriverWait condition: new assistant turn, not streaming, text stable for stable_ms"""
+
+    def __init__(self, previous_turns, stable_ms, turn_selector=ASSISTANT_TURN_SELECTOR):
+        self.previous_turns = previous_turns
+        self.stable_ms = stable_ms
+        self.turn_selector = turn_selector
+        self.last_signature = None
+        self.stable_since = None
+        self.last_state = None
+
+    def __call__(self, driver):
+        state = driver.execute_script(RESPONSE_STATE_JS, self.turn_selector, STOP_BUTTON_SELECTOR)
+        self.last_state = state
+
+        if state["turns"] <= self.previous_turns or state["length"] == 0:
+            return False
+
+        now = time.monotonic()
+        signature = (state["turns"], state["length"], state["tail"])
+        if signature != self.last_signature:
+            self.last_signature = signature
+            self.stable_since = now
+            return False
+
+        if state["streaming"]:
+            return False
+
+        stable_ms = (now - self.stable_since) * 1000
+        return stable_ms >= self.stable_ms and state["quiet_ms"] >= self.stable_ms
+
+
+def wait_for_response(driver, previous_turns, timeout=180, stable_ms=1500, poll_interval=0.25,
+                      turn_selector=ASSISTANT_TURN_SELECTOR):
+    """
+    Block until the assistant's answer to the last prompt has finished streaming.
+
+    Polls only a small status object; the answer itself is fetched once at the
+    end with extract_last_response. Returns that dict plus "complete" (False if
+    the answer was still changing at the timeout - whatever text is there is
+    returned rather than nothing), or None if no new answer appeared.
+    """
+    install_mutation_observer(driver)
+    condition = _ResponseComplete(previous_turns, stable_ms, turn_selector)
+    complete = True
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(condition)
+    except TimeoutException:
+        state = condition.last_state
+        if not state or state["turns"] <= previous_turns or state["length"] == 0:
+            return None
+        print(f"   ⚠️ Response still changing after {timeout}s - taking what is there")
+        complete = False
+
+    details = extract_last_response(driver, (turn_selector,))
+    if details:
+        details["complete"] = complete
+    return details
+
+
+def wait_for_response_completion(driver, previous_turns, timeout=180, stable_ms=1500, poll_interval=0.25,
+                                 turn_selector=ASSISTANT_TURN_SELECTOR):
+    """Same as wait_for_response, but returns just the answer text (or None)"""
+    details = wait_for_response(driver, previous_turns, timeout, stable_ms, poll_interval, turn_selector)
+    return details["text"] if details else None
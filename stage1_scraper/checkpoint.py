@@ -0,0 +1,92 @@
+"""
+CHECKPOINT MODULE - append-only response log so scraping runs survive crashes
+
+Every processed response is appended (and fsynced) to a JSONL log as soon as
+it arrives. If the run dies at prompt 900 of 1,000, resuming from the log:
+
+1. repairs a torn final line left by the crash
+2. rebuilds the BrandMentionProcessor from the logged counts (no re-scraping,
+   no re-counting unless the brand list changed)
+3. tells the scraper which prompts are already done, so only the rest run
+
+The log uses the same record format as JsonlResponseWriter, so it is also a
+valid JSONL results file for batch_processor.py.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from result_writer import JsonlResponseWriter
+
+
+def read_checkpoint(path):
+    """
+    Yield logged records in order. A partial last line (crash mid-write) is
+    dropped and cut off the file, so new appends start on a clean line.
+    """
+    if not os.path.exists(path):
+        return
+
+    good_offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            good_offset += len(line)
+            yield record
+
+    if good_offset < os.path.getsize(path):
+        print(f"   ⚠️ Dropping incomplete record at the end of {path}")
+        with open(path, 'r+b') as f:
+            f.truncate(good_offset)
+
+
+def restore_processor(processor, path):
+    """
+    Replay a checkpoint log into a processor. Returns the set of prompts that
+    already have a response.
+    """
+    completed_prompts = set()
+    brands = set(processor.target_brands)
+    restored = 0
+
+    for record in read_checkpoint(path):
+        brand_counts = record["brand_mentions"]
+        if set(brand_counts) != brands:
+            # Brand list changed since the log was written - recount the saved text
+            brand_counts = processor.matcher.count(record["response"])
+
+        processor.record_result(
+            record["prompt"],
+            record["response"],
+            brand_counts,
+            timestamp=datetime.fromisoformat(record["timestamp"])
+        )
+        completed_prompts.add(record["prompt"])
+        restored += 1
+
+    if restored:
+        print(f"   ♻️ Restored {restored} responses from checkpoint {path}")
+    return completed_prompts
+
+
+def open_checkpoint(processor, path, resume=False):
+    """
+    Attach a durable checkpoint log to the processor. With resume=True the
+    existing log is replayed first; otherwise a fresh log is started.
+    Returns the set of prompts already completed.
+    """
+    completed_prompts = set()
+    if resume:
+        completed_prompts = restore_processor(processor, path)
+        mode = 'a'
+    else:
+        mode = 'w'
+
+    processor.attach_response_writer(JsonlResponseWriter(path, mode=mode, durable=True))
+    return completed_prompts
@@ -2,19 +2,68 @@
 DATA PROCESSOR MODULE - anaylzing chat gpt responses and counting brand mentions
 """
 
-import re
-import json
+import os
 from datetime import datetime
 from prompts import get_target_brands
+from brand_matcher import get_matcher
+from response_store import ResponseStore, naive_local
+from analytics import numpy_available, vectorized_analysis
+from result_writer import JsonStream, JsonlResponseWriter, write_json_streaming
 
 
 class BrandMentionProcessor:
     #processes text and counts brand mentions
-    def __init__(self):
+    def __init__(self, keep_responses=True, analytics_backend="auto", co_occurrence=False):
         self.target_brands = get_target_brands()  # Get brands from prompts module
-        self.processed_data = []  # List to store all our results
+        self.matcher = get_matcher(self.target_brands)  # Compiled once per brand set
+        # Columnar store of all our results (keep_responses=False drops the raw text)
+        self.processed_data = ResponseStore(self.target_brands, keep_responses=keep_responses)
+        self._reset_aggregates()
+        
+        # "numpy" = vectorized stats + distribution analysis, "python" = running totals only
+        if analytics_backend == "auto":
+            analytics_backend = "numpy" if numpy_available() else "python"
+        if analytics_backend not in ("numpy", "python"):
+            raise ValueError(f"Unknown analytics backend: {analytics_backend}")
+        if analytics_backend == "numpy" and not numpy_available():
+            raise ImportError("analytics_backend='numpy' needs NumPy installed")
+        self.analytics_backend = analytics_backend
+        # Brand co-occurrence is brands x brands, so only computed (NumPy backend) when asked for
+        self.co_occurrence = co_occurrence
+        
+        # Optional JSONL writer that gets every response as soon as it is processed
+        self.response_writer = None
+        
         print(f"Created processor tracking: {', '.join(self.target_brands)}")
     
+    def _reset_aggregates(self):
+        """Running totals kept up to date by process_response, so summaries never rescan"""
+        self.brand_totals = {brand: 0 for brand in self.target_brands}
+        self.brand_max_counts = {brand: 0 for brand in self.target_brands}
+        self.brand_response_coverage = {brand: 0 for brand in self.target_brands}
+        self.total_response_length = 0
+        self.min_response_mentions = None
+        self.max_response_mentions = None
+        self.max_mentions_index = None  # 0-based index of the first response with the most mentions
+    
+    def _update_aggregates(self, result, response_length):
+        """Fold one processed response into the running totals"""
+        for brand, count in result["brand_mentions"].items():
+            self.brand_totals[brand] += count
+            if count > self.brand_max_counts[brand]:
+                self.brand_max_counts[brand] = count
+            if count > 0:
+                self.brand_response_coverage[brand] += 1
+        
+        self.total_response_length += response_length
+        
+        total = result["total_mentions"]
+        if self.max_response_mentions is None or total > self.max_response_mentions:
+            self.max_response_mentions = total
+            self.max_mentions_index = len(self.processed_data) - 1
+        if self.min_response_mentions is None or total < self.min_response_mentions:
+            self.min_response_mentions = total
+    
     def count_brand_mentions(self, text):
         """
         This function counts how many times each brand appears in text. 
@@ -22,17 +71,27 @@ class BrandMentionProcessor:
         """
         print(f"\n🔍 Analyzing text: '{text[:50]}...'")
         
-        # Convert to lowercase for case-insensitive matching
-        text_lower = text.lower()
-        brand_counts = {}
+        # One case-insensitive scan finds every brand at once
+        brand_counts = self.matcher.count(text)
         
-        for brand in self.target_brands:
-            pattern = r'\b' + re.escape(brand.lower()) + r'\b'
-            matches = re.findall(pattern, text_lower)
-            count = len(matches)
-            
-            brand_counts[brand] = count
-            
+        for brand, count in brand_counts.items():
+            if count > 0:
+                print(f"   ✅ Found '{brand}': {count} times")
+        
+        return brand_counts
+    
+    def count_brand_mentions_stream(self, chunks):
+        """
+        Streaming version of count_brand_mentions for very large responses
+        or conversation exports. Takes any iterable of text chunks, e.g.
+        iter_file_chunks(open("export.txt")), and never holds the full text.
+        Returns: dict: {"Nike": 2, "Adidas": 1, ...}
+        """
+        print(f"\n🔍 Analyzing text stream...")
+        
+        brand_counts = self.matcher.count_stream(chunks)
+        
+        for brand, count in brand_counts.items():
             if count > 0:
                 print(f"   ✅ Found '{brand}': {count} times")
         
@@ -44,9 +103,22 @@ class BrandMentionProcessor:
         # Count the brand mentions
         brand_counts = self.count_brand_mentions(response)
         
+        result = self.record_result(prompt, response, brand_counts)
+        
+        print(f"   Total mentions in this response: {result['total_mentions']}")
+        return result
+    
+    def record_result(self, prompt, response, brand_counts, timestamp=None):
+        """
+        Store already-counted brand mentions and update the running totals.
+        Used by process_response and by the batch path, which counts in worker processes.
+        """
+        # Converted once, so the store, the JSONL log and this result all agree
+        timestamp = naive_local(timestamp) if timestamp else datetime.now()
+        
         # Create a structured data package
         result = {
-            "timestamp": datetime.now().isoformat(),  # When this happened
+            "timestamp": timestamp.isoformat(),       # When this happened
             "prompt": prompt,                         # What we asked
             "response": response,                     # What ChatGPT said
             "brand_mentions": brand_counts,           # Our analysis
@@ -54,19 +126,44 @@ class BrandMentionProcessor:
         }
         
         # Store it in our collection
-        self.processed_data.append(result)
+        index = self.processed_data.append(prompt, response, brand_counts, timestamp=timestamp)
+        self._update_aggregates(result, len(response))
+        
+        if self.response_writer is not None:
+            self.response_writer.write(self._response_record(result, index, len(response)))
         
-        print(f"   Total mentions in this response: {result['total_mentions']}")
         return result
     
+    @staticmethod
+    def _response_record(result, index, response_length):
+        """One line of the JSONL output: the result plus its number and length"""
+        return {
+            "response_number": index + 1,
+            "timestamp": result["timestamp"],
+            "prompt": result["prompt"],
+            "response": result["response"],
+            "response_length": response_length,
+            "brand_mentions": result["brand_mentions"],
+            "total_mentions": result["total_mentions"]
+        }
+    
+    def attach_response_writer(self, writer):
+        """
+        Stream every processed response to a JsonlResponseWriter as it arrives,
+        so results hit disk before the run ends.
+        """
+        self.response_writer = writer
+        return writer
+    
+    def iter_response_records(self):
+        """All stored responses in JSONL record form, built one at a time"""
+        store = self.processed_data
+        for i in range(len(store)):
+            yield self._response_record(store.record(i), i, store.response_lengths[i])
+    
     def get_summary(self):
-        # Initialize totals
-        total_counts = {brand: 0 for brand in self.target_brands}
-        
-        # Add up all the individual counts
-        for data in self.processed_data:
-            for brand, count in data["brand_mentions"].items():
-                total_counts[brand] += count
+        # Totals are maintained by process_response
+        total_counts = dict(self.brand_totals)
         
         summary = {
             "total_responses_processed": len(self.processed_data),
@@ -79,68 +176,84 @@ class BrandMentionProcessor:
         
         return summary
     
-    def get_comprehensive_analysis(self):
+    def iter_response_analysis(self):
+        """Per-response analysis rows, read straight from the store columns (no response text needed)"""
+        store = self.processed_data
+        for i in range(len(store)):
+            yield {
+                "response_number": i + 1,
+                "prompt": store.prompt(i),
+                "response_length": store.response_lengths[i],
+                "total_mentions": store.totals[i],
+                "brand_breakdown": store.brand_counts(i),
+                "timestamp": store.timestamp(i)
+            }
+    
+    def get_comprehensive_analysis(self, include_response_analysis=True):
         """
         📊 COMPREHENSIVE ANALYSIS
         =======================
-        Generate detailed aggregate statistics and analysis tables
+        Generate detailed aggregate statistics and analysis tables.
+        include_response_analysis=False leaves out the per-response list
+        (use iter_response_analysis() to stream it instead).
         """
         if not self.processed_data:
             return {}
         
-        # Basic summary
-        total_counts = {brand: 0 for brand in self.target_brands}
-        for data in self.processed_data:
-            for brand, count in data["brand_mentions"].items():
-                total_counts[brand] += count
+        store = self.processed_data
+        total_responses = len(store)
+        distribution_analysis = None
         
-        total_mentions = sum(total_counts.values())
-        total_responses = len(self.processed_data)
-        
-        # Aggregate brand analysis
-        brand_analysis = {}
-        for brand in self.target_brands:
-            brand_total = total_counts[brand]
-            brand_counts = [resp['brand_mentions'][brand] for resp in self.processed_data]
+        if self.analytics_backend == "numpy":
+            # One vectorized pass over the responses x brands count matrix
+            stats = vectorized_analysis(store, co_occurrence=self.co_occurrence)
+            total_counts = stats["brand_totals"]
+            total_mentions = sum(total_counts.values())
+            brand_analysis = stats["brand_analysis"]
+            max_mentions_index = stats["max_mentions_index"]
+            min_mentions = stats["min_response_mentions"]
+            max_mentions = stats["max_response_mentions"]
+            avg_response_length = stats["avg_response_length"]
+            distribution_analysis = stats["distribution_analysis"]
+        else:
+            # Basic summary (running totals, no rescan)
+            total_counts = dict(self.brand_totals)
+            total_mentions = sum(total_counts.values())
             
-            brand_analysis[brand] = {
-                "total_mentions": brand_total,
-                "percentage": (brand_total / total_mentions * 100) if total_mentions > 0 else 0,
-                "avg_per_response": brand_total / total_responses,
-                "max_in_single_response": max(brand_counts),
-                "responses_with_mentions": sum(1 for count in brand_counts if count > 0),
-                "response_coverage": (sum(1 for count in brand_counts if count > 0) / total_responses * 100)
-            }
+            # Aggregate brand analysis
+            brand_analysis = {}
+            for brand in self.target_brands:
+                brand_total = total_counts[brand]
+                responses_with_mentions = self.brand_response_coverage[brand]
+                
+                brand_analysis[brand] = {
+                    "total_mentions": brand_total,
+                    "percentage": (brand_total / total_mentions * 100) if total_mentions > 0 else 0,
+                    "avg_per_response": brand_total / total_responses,
+                    "max_in_single_response": self.brand_max_counts[brand],
+                    "responses_with_mentions": responses_with_mentions,
+                    "response_coverage": (responses_with_mentions / total_responses * 100)
+                }
+            
+            max_mentions_index = self.max_mentions_index
+            min_mentions = self.min_response_mentions
+            max_mentions = self.max_response_mentions
+            avg_response_length = self.total_response_length / total_responses
         
         # Response analysis
-        response_analysis = []
-        for i, resp in enumerate(self.processed_data, 1):
-            response_analysis.append({
-                "response_number": i,
-                "prompt": resp['prompt'],
-                "response_length": len(resp['response']),
-                "total_mentions": resp['total_mentions'],
-                "brand_breakdown": resp['brand_mentions'],
-                "timestamp": resp['timestamp']
-            })
+        response_analysis = list(self.iter_response_analysis()) if include_response_analysis else None
         
         # Key insights
-        max_mentions_response = max(self.processed_data, key=lambda x: x['total_mentions'])
-        max_mentions_idx = self.processed_data.index(max_mentions_response) + 1
-        
         dominant_brand = max(total_counts, key=total_counts.get)
         second_brand = sorted(total_counts.items(), key=lambda x: x[1], reverse=True)[1][0]
         
-        response_totals = [r['total_mentions'] for r in self.processed_data]
-        consistency = min(response_totals) / max(response_totals) * 100 if max(response_totals) > 0 else 0
-        
-        avg_response_length = sum(len(r['response']) for r in self.processed_data) / len(self.processed_data)
+        consistency = min_mentions / max_mentions * 100 if max_mentions > 0 else 0
         
         insights = {
             "most_mentions_single_response": {
-                "count": max_mentions_response['total_mentions'],
-                "response_number": max_mentions_idx,
-                "prompt": max_mentions_response['prompt']
+                "count": max_mentions,
+                "response_number": max_mentions_index + 1,
+                "prompt": store.prompt(max_mentions_index)
             },
             "dominant_brand": {
                 "name": dominant_brand,
@@ -154,9 +267,9 @@ class BrandMentionProcessor:
             },
             "response_consistency": {
                 "consistency_percentage": consistency,
-                "min_mentions": min(response_totals),
-                "max_mentions": max(response_totals),
-                "range": max(response_totals) - min(response_totals)
+                "min_mentions": min_mentions,
+                "max_mentions": max_mentions,
+                "range": max_mentions - min_mentions
             },
             "averages": {
                 "response_length": avg_response_length,
@@ -177,43 +290,80 @@ class BrandMentionProcessor:
             }
         }
         
-        return {
+        analysis = {
             "brand_analysis": brand_analysis,
             "response_analysis": response_analysis,
             "key_insights": insights,
             "market_share_analysis": market_share
         }
+        if not include_response_analysis:
+            del analysis["response_analysis"]
+        
+        # Percentiles, stddev and (opt-in) co-occurrence only come with the NumPy backend
+        if distribution_analysis is not None:
+            analysis["distribution_analysis"] = distribution_analysis
+        
+        return analysis
 
-    def save_to_json(self, filename="brand_mentions.json"):
+    def save_to_json(self, filename="brand_mentions.json", indent=2, jsonl_path=None):
         """
         💾 SAVE OUR WORK WITH COMPREHENSIVE ANALYSIS
         ============================================
         Saves all processed data plus detailed aggregate analysis to JSON file.
+        
+        Responses are streamed to disk one at a time, so memory stays flat.
+        indent=None writes compact JSON. With jsonl_path, responses go to that
+        JSONL file instead and filename only gets the (small) summary.
         """
         print(f"\n💾 Saving comprehensive results to {filename}...")
         
         # Get basic summary
         summary = self.get_summary()
         
-        # Get comprehensive analysis
-        comprehensive_analysis = self.get_comprehensive_analysis()
+        # Get comprehensive analysis (per-response rows are streamed below)
+        comprehensive_analysis = self.get_comprehensive_analysis(include_response_analysis=False)
         
-        # Package everything together
-        output = {
-            "analysis_timestamp": datetime.now().isoformat(),
-            "summary": summary,
-            "comprehensive_analysis": comprehensive_analysis,
-            "detailed_responses": self.processed_data
-        }
+        if jsonl_path:
+            self.save_responses_jsonl(jsonl_path)
+            output = {
+                "analysis_timestamp": datetime.now().isoformat(),
+                "summary": summary,
+                "comprehensive_analysis": comprehensive_analysis,
+                "responses_file": os.path.basename(jsonl_path)
+            }
+        else:
+            # Package everything together, keeping the original key order
+            streamed_analysis = {}
+            if comprehensive_analysis:
+                streamed_analysis["brand_analysis"] = comprehensive_analysis.pop("brand_analysis")
+                streamed_analysis["response_analysis"] = JsonStream(self.iter_response_analysis())
+                streamed_analysis.update(comprehensive_analysis)
+            output = {
+                "analysis_timestamp": datetime.now().isoformat(),
+                "summary": summary,
+                "comprehensive_analysis": streamed_analysis,
+                "detailed_responses": JsonStream(self.processed_data)
+            }
         
         # Write to file
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        write_json_streaming(filename, output, indent=indent)
         
         print(f"   ✅ Saved {len(self.processed_data)} responses with comprehensive analysis to {filename}")
         print(f"   📊 Includes: Brand analysis, response analysis, key insights, and market share data")
         return filename
     
+    def save_responses_jsonl(self, path):
+        """Write every stored response to a JSONL file, one line per response"""
+        if self.response_writer is not None and os.path.abspath(self.response_writer.path) == os.path.abspath(path):
+            # Already streamed there as responses arrived
+            self.response_writer.flush()
+            return path
+        
+        with JsonlResponseWriter(path, mode='w') as writer:
+            for record in self.iter_response_records():
+                writer.write(record)
+        return path
+    
     def print_detailed_summary(self):
         """
         🖨️ PRETTY PRINT SUMMARY
@@ -273,6 +423,92 @@ def test_processor():
     return processor
 
 
+def _rescan_analysis(processed_data, target_brands):
+    """
+    Reference implementation: recomputes the aggregates by walking every
+    stored response, the way the processor used to on each call.
+    """
+    total_counts = {brand: 0 for brand in target_brands}
+    for data in processed_data:
+        for brand, count in data["brand_mentions"].items():
+            total_counts[brand] += count
+    
+    total_mentions = sum(total_counts.values())
+    total_responses = len(processed_data)
+    
+    brand_analysis = {}
+    for brand in target_brands:
+        brand_counts = [resp['brand_mentions'][brand] for resp in processed_data]
+        brand_analysis[brand] = {
+            "total_mentions": total_counts[brand],
+            "percentage": (total_counts[brand] / total_mentions * 100) if total_mentions > 0 else 0,
+            "avg_per_response": total_counts[brand] / total_responses,
+            "max_in_single_response": max(brand_counts),
+            "responses_with_mentions": sum(1 for count in brand_counts if count > 0),
+            "response_coverage": (sum(1 for count in brand_counts if count > 0) / total_responses * 100)
+        }
+    
+    max_mentions_response = max(processed_data, key=lambda x: x['total_mentions'])
+    response_totals = [r['total_mentions'] for r in processed_data]
+    
+    return {
+        "totals": total_counts,
+        "brand_analysis": brand_analysis,
+        "most_mentions_single_response": {
+            "count": max_mentions_response['total_mentions'],
+            "response_number": processed_data.index(max_mentions_response) + 1,
+            "prompt": max_mentions_response['prompt']
+        },
+        "response_consistency": {
+            "consistency_percentage": min(response_totals) / max(response_totals) * 100 if max(response_totals) > 0 else 0,
+            "min_mentions": min(response_totals),
+            "max_mentions": max(response_totals),
+            "range": max(response_totals) - min(response_totals)
+        },
+        "avg_response_length": sum(len(r['response']) for r in processed_data) / total_responses
+    }
+
+
+def test_incremental_aggregates():
+    """
+    🧪 TEST FUNCTION
+    ================
+    Running totals must give exactly the same answers as a full rescan.
+    """
+    print("🧪 TESTING INCREMENTAL AGGREGATES")
+    print("="*50)
+    
+    backends = ["python", "numpy"] if numpy_available() else ["python"]
+    samples = [
+        ("Best running shoes?", "Nike Pegasus, Nike Vomero and Hoka Clifton are all great."),
+        ("Basketball shoes?", "Jordan and Nike lead, though Adidas and New Balance are close."),
+        ("Gym shoes?", "Try something minimal."),
+        ("Wide feet?", "New Balance and Hoka make wide sizes. New Balance especially."),
+        ("Value picks?", "Adidas, Adidas, Nike, Jordan, Hoka, New Balance - all have sales."),
+    ]
+    
+    for backend in backends:
+        processor = BrandMentionProcessor(analytics_backend=backend)
+        
+        for prompt, response in samples:
+            processor.process_response(prompt, response)
+            
+            expected = _rescan_analysis(list(processor.processed_data), processor.target_brands)
+            summary = processor.get_summary()
+            analysis = processor.get_comprehensive_analysis()
+            
+            assert summary["overall_brand_totals"] == expected["totals"]
+            assert analysis["brand_analysis"] == expected["brand_analysis"]
+            assert analysis["key_insights"]["most_mentions_single_response"] == expected["most_mentions_single_response"]
+            assert analysis["key_insights"]["response_consistency"] == expected["response_consistency"]
+            assert analysis["key_insights"]["averages"]["response_length"] == expected["avg_response_length"]
+        
+        print(f"\n✅ Incremental aggregates match the full rescan ({backend} backend)")
+    
+    return processor
+
+
 if __name__ == "__main__":
     # Run the test when this file is executed directly
-    test_processor() 
\ No newline at end of file
+    test_processor()
+    test_incremental_aggregates() 
\ No newline at end of file
@@ -10,8 +10,17 @@ This file contains all the questions we'll ask ChatGPT.
 - Makes testing different prompts simple
 
 🧠 CONCEPT: We want questions that will naturally mention our target brands
+
+📚 LARGE RUNS: PromptCatalog builds tens of thousands of prompts from
+prompt files and templates (category × use case × year), lazily, with
+duplicates removed and a deterministic shard per worker.
 """
 
+import hashlib
+import itertools
+import json
+import string
+
 # The brands we want to track mentions for
 TARGET_BRANDS = [
     "Nike",
@@ -21,6 +30,36 @@ TARGET_BRANDS = [
     "Jordan"
 ]
 
+# How each brand can show up in a response. All of these count as ONE mention of
+# the brand (the longest match wins, so "Air Jordan" is not also a "Jordan"):
+# - aliases: other names for the brand (case-insensitive)
+# - case_sensitive_aliases: short names that are only the brand in this exact casing
+# - product_lines: also matched as "<brand or alias> <product line>"
+# - exclude: phrases containing the brand name that are NOT the brand
+BRAND_DICTIONARY = {
+    "Nike": {
+        "aliases": ["Nike Inc", "Nike Running"],
+        "product_lines": ["Air Max", "Air Force 1", "Pegasus", "Vaporfly", "Alphafly", "Zoom Fly", "Invincible Run"],
+    },
+    "Adidas": {
+        "aliases": ["adidas Originals", "adidas Performance", "adidas Running"],
+        "product_lines": ["Ultraboost", "Adizero", "Adistar", "Stan Smith", "Supernova"],
+    },
+    "Hoka": {
+        "aliases": ["HOKA ONE ONE"],
+        "product_lines": ["Clifton", "Bondi", "Speedgoat", "Arahi", "Mach X"],
+    },
+    "New Balance": {
+        "aliases": ["New Balance Athletics"],
+        "case_sensitive_aliases": ["NB"],
+        "product_lines": ["Fresh Foam", "FuelCell"],
+    },
+    "Jordan": {
+        "aliases": ["Air Jordan", "Jordan Brand", "Jumpman"],
+        "exclude": ["Michael Jordan", "Michael B. Jordan", "Jordan Peterson", "Jordan River", "Kingdom of Jordan"],
+    },
+}
+
 # Questions designed to get ChatGPT to mention athletic shoe brands
 SPORTSWEAR_PROMPTS = [
     "What are the best running shoes in 2025?",
@@ -35,6 +74,167 @@ SPORTSWEAR_PROMPTS = [
     "Best athletic shoes for people with wide feet"
 ]
 
+# Template prompts - every {field} is filled from TEMPLATE_VALUES (or the catalog's own values)
+SPORTSWEAR_TEMPLATES = [
+    "What are the best {category} for {use_case} in {year}?",
+    "Which brands make the most comfortable {category} for {use_case}?",
+    "Recommend {category} for {use_case} on a budget in {year}",
+]
+
+TEMPLATE_VALUES = {
+    "category": ["running shoes", "basketball shoes", "training shoes", "trail shoes", "walking shoes", "sneakers"],
+    "use_case": ["marathon training", "beginners", "flat feet", "wide feet", "the gym", "everyday wear"],
+    "year": ["2024", "2025"],
+}
+
+
+def normalize_prompt(prompt):
+    """Case, whitespace and trailing punctuation don't change the question"""
+    return " ".join(prompt.lower().split()).rstrip("?!. ")
+
+
+def prompt_digest(prompt):
+    """Stable 8-byte fingerprint of a prompt (same on every machine and run)"""
+    return hashlib.blake2b(normalize_prompt(prompt).encode("utf-8"), digest_size=8).digest()
+
+
+def expand_template(template, values):
+    """
+    🔁 Lazily yield every filled-in version of a template.
+    "Best {category} in {year}" × 6 categories × 2 years -> 12 prompts
+    """
+    fields = []
+    for _, field, _, _ in string.Formatter().parse(template):
+        if field and field not in fields:
+            fields.append(field)
+    for combination in itertools.product(*(values[field] for field in fields)):
+        yield template.format(**dict(zip(fields, combination)))
+
+
+def _iter_prompt_file(path, values=None):
+    """
+    Prompts from a file:
+    - .txt    one prompt per line (blank lines and # comments skipped)
+    - .jsonl  {"prompt": "..."} or {"template": "...", "values": {"field": [...]}} per line
+    Templates are filled from values (default TEMPLATE_VALUES), overridden
+    by the entry's own "values".
+    """
+    values = TEMPLATE_VALUES if values is None else values
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not path.endswith('.jsonl'):
+                yield line
+                continue
+            entry = json.loads(line)
+            if "template" in entry:
+                yield from expand_template(entry["template"], {**values, **entry.get("values", {})})
+            else:
+                yield entry["prompt"]
+
+
+class PromptCatalog:
+    """
+    📚 PROMPT CATALOG
+    Collects prompt sources (lists, files, templates) without reading or
+    expanding anything until it is iterated. Iterating yields each distinct
+    prompt once, in source order.
+
+    💡 SHARDING: shard(i, n) gives worker i its share of the prompts, chosen by
+    prompt hash - every worker can iterate the same catalog independently and
+    no prompt is done twice.
+    """
+
+    def __init__(self, prompts=None, files=(), templates=(), values=None, dedupe=True):
+        self.sources = []
+        self.dedupe = dedupe
+        self.values = {**TEMPLATE_VALUES, **(values or {})}
+        if prompts is not None:
+            self.add_prompts(prompts)
+        for path in files:
+            self.add_file(path)
+        for template in templates:
+            self.add_template(template)
+
+    def add_prompts(self, prompts):
+        self.sources.append(lambda: iter(prompts))
+        return self
+
+    def add_file(self, path):
+        self.sources.append(lambda: _iter_prompt_file(path, self.values))
+        return self
+
+    def add_template(self, template, **values):
+        values = {**self.values, **values}
+        self.sources.append(lambda: expand_template(template, values))
+        return self
+
+    def _iter_with_digests(self):
+        seen = set()
+        for source in self.sources:
+            for prompt in source():
+                digest = prompt_digest(prompt)
+                if self.dedupe:
+                    if digest in seen:
+                        continue
+                    seen.add(digest)
+                yield prompt, digest
+
+    def __iter__(self):
+        for prompt, _ in self._iter_with_digests():
+            yield prompt
+
+    def shard(self, index, count):
+        """Prompts belonging to worker index of count (deterministic across runs)"""
+        if not 0 <= index < count:
+            raise ValueError(f"shard index must be in 0..{count - 1}")
+        for prompt, digest in self._iter_with_digests():
+            if int.from_bytes(digest, 'big') % count == index:
+                yield prompt
+
+    def count(self):
+        """Number of distinct prompts (walks the whole catalog)"""
+        return sum(1 for _ in self)
+
+
+def get_prompt_catalog(files=()):
+    """
+    🔄 GETTER FUNCTION
+    The hand-written prompts plus every expansion of SPORTSWEAR_TEMPLATES,
+    plus any prompt files passed in. Nothing is built until it is iterated.
+    """
+    return PromptCatalog(SPORTSWEAR_PROMPTS, files=files, templates=SPORTSWEAR_TEMPLATES)
+
+
+def select_prompts(use_catalog=False, files=(), shard=None):
+    """
+    🔄 Prompt source for the command-line scrapers.
+    - default: get_prompts() (the hand-written list)
+    - use_catalog / files: the full lazy catalog
+    - shard "i/n": only worker i's share of the catalog
+    """
+    if not (use_catalog or files or shard):
+        return get_prompts()
+    catalog = get_prompt_catalog(files)
+    if shard:
+        index, count = (int(part) for part in shard.split('/'))
+        return catalog.shard(index, count)
+    return iter(catalog)
+
+
+def known_prompt_count(prompts):
+    """
+    len(prompts) for lists, None for lazy sources (catalogs, shards,
+    generators) - never walks them just to show progress.
+    """
+    try:
+        return len(prompts)
+    except TypeError:
+        return None
+
+
 def get_prompts():
     """
     🔄 GETTER FUNCTION
@@ -54,6 +254,14 @@ def get_target_brands():
     return TARGET_BRANDS
 
 
+def get_brand_dictionary():
+    """
+    🔄 GETTER FUNCTION
+    Returns the alias / product line / exclusion dictionary for the brands.
+    """
+    return BRAND_DICTIONARY
+
+
 # 🧪 TEST THE MODULE
 if __name__ == "__main__":
     print("📋 Testing prompts module...")
@@ -61,4 +269,11 @@ if __name__ == "__main__":
     print(f"🏷️  Target brands: {', '.join(get_target_brands())}")
     print("\n🎯 Sample prompts:")
     for i, prompt in enumerate(get_prompts()[:3], 1):
+        print(f"   {i}. {prompt}")
+    
+    catalog = get_prompt_catalog()
+    print(f"\n📚 Default catalog: {catalog.count()} distinct prompts")
+    shard_sizes = [sum(1 for _ in catalog.shard(i, 4)) for i in range(4)]
+    print(f"🧩 4 shards: {shard_sizes}")
+    for i, prompt in enumerate(itertools.islice(catalog.shard(0, 4), 3), 1):
         print(f"   {i}. {prompt}") 
\ No newline at end of file
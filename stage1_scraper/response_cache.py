@@ -0,0 +1,185 @@
+"""
+RESPONSE CACHE MODULE - local SQLite cache of raw ChatGPT answers
+
+Every scraping run used to re-ask ChatGPT every prompt, even when we had a
+fresh answer from yesterday. ResponseCache stores the raw response text
+keyed by a content hash of:
+
+    normalized prompt + model + date window
+
+so a rerun inside the same window only scrapes the cache misses. Only raw
+text is stored (never brand counts), so re-scoring with a new brand list
+just runs the cached text through BrandMentionProcessor again - e.g.
+`python batch_processor.py response_cache.sqlite3`.
+
+- TTL: entries older than ttl_days are treated as misses and removed
+- LRU: when the cache grows past max_entries, the least recently used
+  entries are evicted
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from prompts import normalize_prompt
+
+DEFAULT_CACHE_FILE = "response_cache.sqlite3"
+DEFAULT_MODEL = "chatgpt-web"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    model TEXT NOT NULL,
+    date_window TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+"""
+
+
+class ResponseCache:
+    """
+    Content-addressed store of raw responses with TTL and LRU eviction
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, model=DEFAULT_MODEL, window_days=7, ttl_days=30,
+                 max_entries=100_000):
+        self.path = path
+        self.model = model
+        self.window_days = window_days  # answers are reused within one window of this many days
+        self.ttl_days = ttl_days
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")  # readers don't block the scraper
+        self.connection.executescript(SCHEMA)
+
+    def window(self, now=None):
+        """Start date of the date window that now falls in, e.g. '2025-06-23'"""
+        now = time.time() if now is None else now
+        window_seconds = self.window_days * 86400
+        start = int(now // window_seconds) * window_seconds
+        return datetime.fromtimestamp(start, tz=timezone.utc).date().isoformat()
+
+    def key(self, prompt, now=None):
+        material = "\x1f".join((normalize_prompt(prompt), self.model, self.window(now)))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, prompt):
+        """Cached response text for prompt in the current window, or None"""
+        now = time.time()
+        key = self.key(prompt, now)
+        row = self.connection.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or now - row[1] > self.ttl_days * 86400:
+            if row is not None:
+                with self.connection:
+                    self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+        with self.connection:
+            self.connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, prompt, response):
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, prompt, model, date_window, response, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.key(prompt, now), prompt, self.model, self.window(now), response, now, now)
+            )
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_days * 86400,)
+            )
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self.connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+                )
+
+    def iter_pairs(self, model=None):
+        """
+        Yield every cached answer as {"prompt", "response", "timestamp"} (oldest
+        first), the same shape batch_processor reads from JSON/JSONL files.
+        """
+        query = "SELECT prompt, response, created_at FROM responses"
+        params = ()
+        if model is not None:
+            query += " WHERE model = ?"
+            params = (model,)
+        for prompt, response, created_at in self.connection.execute(query + " ORDER BY created_at", params):
+            yield {
+                "prompt": prompt,
+                "response": response,
+                "timestamp": datetime.fromtimestamp(created_at).isoformat()
+            }
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups * 100 if lookups else 0.0
+
+    def summary(self):
+        return (f"{self.hits}/{self.hits + self.misses} cache hits ({self.hit_rate:.0f}%), "
+                f"{len(self)} cached responses in {self.path}")
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def test_response_cache():
+    """Quick self-check: hits, TTL expiry and LRU eviction"""
+    import tempfile
+
+    print("🧪 Testing response cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        with ResponseCache(path, max_entries=2) as cache:
+            cache.put("What are the best running shoes?", "Nike and Hoka")
+            assert cache.get("  what are the BEST running shoes") == "Nike and Hoka"
+            assert cache.get("Best gym shoes?") is None
+
+            # LRU: touching the first entry makes the second one the eviction victim
+            cache.put("Best gym shoes?", "Adidas")
+            cache.get("What are the best running shoes?")
+            cache.put("Best trail shoes?", "Hoka")
+            assert cache.get("Best gym shoes?") is None
+            assert cache.get("What are the best running shoes?") == "Nike and Hoka"
+
+            # TTL: an entry older than ttl_days is a miss
+            cache.ttl_days = 0
+            assert cache.get("Best trail shoes?") is None
+
+            print(f"   {cache.summary()}")
+    print("✅ Response cache test passed")
+
+
+if __name__ == "__main__":
+    test_response_cache()
@@ -0,0 +1,132 @@
+"""
+RESPONSE STORE MODULE - compact, column-oriented storage for processed responses
+
+Keeping one dict per response (prompt, response, ISO timestamp string and a
+per-brand dict) costs well over a kilobyte of Python objects per response.
+ResponseStore keeps the same information in flat typed arrays instead:
+
+- brand counts: one unsigned int per (response, brand), row-major, indexed by brand id
+- prompts: interned once, each response stores a prompt id
+- timestamps: microseconds since the epoch (naive local time, like datetime.now();
+  timezone-aware timestamps are converted to local time first)
+- response text: optional (keep_responses=False keeps only the length)
+
+Rows are turned back into the familiar dicts on demand, so code that reads
+processor.processed_data keeps working.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def naive_local(timestamp):
+    """
+    Timestamp in the store's convention: naive local time. An aware one
+    (e.g. "2024-05-01T12:00:00+02:00" from a JSONL capture) becomes the same
+    instant in local time; naive ones are returned as they are.
+    """
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone().replace(tzinfo=None)
+
+
+class ResponseStore:
+    """Column store behind BrandMentionProcessor.processed_data"""
+
+    def __init__(self, brands, keep_responses=True):
+        self.brands = list(brands)
+        self.brand_index = {brand: i for i, brand in enumerate(self.brands)}
+        self.num_brands = len(self.brands)
+
+        self.counts = array('I')            # len(self) x num_brands, row-major
+        self.totals = array('I')            # total mentions per response
+        self.prompt_ids = array('I')
+        self.response_lengths = array('I')
+        self.timestamps = array('q')        # microseconds since _EPOCH
+
+        self.prompts = []                   # interned prompt text, indexed by prompt id
+        self._prompt_lookup = {}
+
+        self.keep_responses = keep_responses
+        self.responses = [] if keep_responses else None
+
+    def __len__(self):
+        return len(self.totals)
+
+    def __bool__(self):
+        return len(self.totals) > 0
+
+    def append(self, prompt, response, brand_counts, timestamp=None, response_length=None):
+        """Store one processed response; returns its row index"""
+        prompt_id = self._prompt_lookup.get(prompt)
+        if prompt_id is None:
+            prompt_id = len(self.prompts)
+            self.prompts.append(prompt)
+            self._prompt_lookup[prompt] = prompt_id
+
+        row = [0] * self.num_brands
+        for brand, count in brand_counts.items():
+            row[self.brand_index[brand]] = count
+
+        if timestamp is None:
+            timestamp = datetime.now()
+        else:
+            timestamp = naive_local(timestamp)
+        if response_length is None:
+            response_length = len(response)
+
+        self.counts.extend(row)
+        self.totals.append(sum(row))
+        self.prompt_ids.append(prompt_id)
+        self.response_lengths.append(response_length)
+        self.timestamps.append((timestamp - _EPOCH) // _ONE_MICROSECOND)
+        if self.keep_responses:
+            self.responses.append(response)
+
+        return len(self.totals) - 1
+
+    def _row_index(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("response index out of range")
+        return index
+
+    def prompt(self, index):
+        return self.prompts[self.prompt_ids[self._row_index(index)]]
+
+    def timestamp(self, index):
+        """ISO timestamp string for a row, same format as datetime.now().isoformat()"""
+        return (_EPOCH + timedelta(microseconds=self.timestamps[self._row_index(index)])).isoformat()
+
+    def brand_counts(self, index):
+        """Per-brand dict for a row: {"Nike": 2, "Adidas": 1, ...}"""
+        start = self._row_index(index) * self.num_brands
+        return dict(zip(self.brands, self.counts[start:start + self.num_brands]))
+
+    def brand_column(self, brand):
+        """All counts for one brand, in response order"""
+        return self.counts[self.brand_index[brand]::self.num_brands]
+
+    def record(self, index):
+        """Rebuild the dict that processed_data used to hold for a row"""
+        index = self._row_index(index)
+        return {
+            "timestamp": self.timestamp(index),
+            "prompt": self.prompt(index),
+            "response": self.responses[index] if self.keep_responses else None,
+            "brand_mentions": self.brand_counts(index),
+            "total_mentions": self.totals[index]
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(len(self)))]
+        return self.record(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
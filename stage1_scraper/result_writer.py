@@ -0,0 +1,145 @@
+"""
+RESULT WRITER MODULE - streaming JSON / JSONL output for processed responses
+
+save_to_json used to build one giant dict (every full response included) and
+json.dump it in one go, which doubles memory on large runs. The writers here
+emit the big lists item by item instead:
+
+- write_json_streaming: same JSON document as before, but lists wrapped in
+  JsonStream are written one element at a time. With indent=2 the output is
+  byte-for-byte what json.dump(..., indent=2) would have produced.
+- JsonlResponseWriter: one response per line, appended as responses arrive,
+  so the write starts before scraping ends.
+"""
+
+import json
+import os
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class JsonStream:
+    """
+    Marks an iterable that should be written as a JSON list, one item at a time.
+    Items must be plain JSON values (no nested JsonStream).
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def _contains_stream(value):
+    if isinstance(value, JsonStream):
+        return True
+    if isinstance(value, dict):
+        return any(_contains_stream(v) for v in value.values())
+    return False
+
+
+_encoders = {}
+
+
+def _encoder(indent):
+    """One reusable encoder per indent (json.dumps builds a new one on every call)"""
+    if indent not in _encoders:
+        separators = (',', ':') if indent is None else (',', ': ')
+        _encoders[indent] = json.JSONEncoder(indent=indent, ensure_ascii=False, separators=separators)
+    return _encoders[indent]
+
+
+def _dumps(value, indent, level):
+    """Encode a plain value, re-indented to sit at the given nesting level"""
+    text = _encoder(indent).encode(value)
+    if indent is None or level == 0:
+        return text
+    # json escapes newlines inside strings, so every raw newline is structural
+    return text.replace('\n', '\n' + ' ' * (indent * level))
+
+
+def _write_value(f, value, indent, level):
+    if not _contains_stream(value):
+        f.write(_dumps(value, indent, level))
+        return
+
+    if indent is None:
+        newline = inner_pad = outer_pad = ''
+        key_separator = ':'
+    else:
+        newline = '\n'
+        inner_pad = ' ' * (indent * (level + 1))
+        outer_pad = ' ' * (indent * level)
+        key_separator = ': '
+
+    if isinstance(value, JsonStream):
+        # stream items are plain JSON values, no need to look inside them
+        f.write('[')
+        first = True
+        for item in value:
+            f.write(('' if first else ',') + newline + inner_pad)
+            f.write(_dumps(item, indent, level + 1))
+            first = False
+        if not first:
+            f.write(newline + outer_pad)
+        f.write(']')
+        return
+
+    f.write('{')
+    first = True
+    for key, item in value.items():
+        f.write(('' if first else ',') + newline + inner_pad)
+        f.write(json.dumps(str(key), ensure_ascii=False) + key_separator)
+        _write_value(f, item, indent, level + 1)
+        first = False
+    if not first:
+        f.write(newline + outer_pad)
+    f.write('}')
+
+
+def write_json_streaming(filename, document, indent=2):
+    """
+    Write a JSON document whose big lists are JsonStream iterables.
+    indent=None writes compact JSON (no whitespace at all).
+    """
+    with open(filename, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        _write_value(f, document, indent, 0)
+    return filename
+
+
+class JsonlResponseWriter:
+    """
+    Appends one processed response per line to a JSONL file as it arrives.
+    Attach it with BrandMentionProcessor.attach_response_writer().
+    flush_each=True pushes every line to the OS right away (live scraping),
+    durable=True also fsyncs it so it survives a crash (checkpoint logs).
+    """
+
+    def __init__(self, path, mode='a', flush_each=False, durable=False):
+        self.path = path
+        self.flush_each = flush_each or durable
+        self.durable = durable
+        self.records_written = 0
+        self._file = open(path, mode, encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.records_written += 1
+        if self.flush_each:
+            self._file.flush()
+        if self.durable:
+            os.fsync(self._file.fileno())
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,278 @@
+"""
+SCRAPER POOL MODULE - run several ChatGPT browser sessions side by side
+
+GPTScrapper drives one Chrome window and works through the prompts one at a
+time, so a few thousand prompts take most of a day. ScraperPool runs N
+sessions at once:
+
+1. each session is its own Chrome instance with its own debug port
+   (base_port + i) and --user-data-dir, so logins and tabs don't collide
+2. every session pulls the next prompt as soon as it is free, so slow
+   answers don't hold up the other sessions. Prompts are read from the
+   (possibly lazy) prompt source only when a session asks for one; the work
+   queue holds just the prompts waiting for a retry
+3. all answers are fed into one shared BrandMentionProcessor behind a lock
+   (and into one checkpoint log, so a pool run can be resumed too)
+
+Sessions spend nearly all their time waiting on the browser, so plain
+threads are enough and wall time drops roughly linearly with the number of
+sessions.
+
+Usage:
+    python scraper_pool.py --sessions 4 [--attach] [--checkpoint run.jsonl]
+"""
+
+import argparse
+import os
+import queue
+import random
+import subprocess
+import threading
+import time
+
+from prompts import get_prompts, known_prompt_count, select_prompts
+from data_processor import BrandMentionProcessor
+from checkpoint import open_checkpoint
+from chatgpt_page import INPUT_MODES
+from GPT_scraper import GPTScrapper, DEFAULT_DEBUG_PORT, DEFAULT_USER_DATA_DIR
+
+# A session that fails this many prompts in a row is assumed dead and retired
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+class ScraperPool:
+    """
+    Pool of GPTScrapper sessions sharing one prompt source and one processor
+    """
+
+    def __init__(self, sessions=2, base_port=DEFAULT_DEBUG_PORT, user_data_root=DEFAULT_USER_DATA_DIR,
+                 delay=3, input_mode="fast", response_timeout=180, stable_ms=1500,
+                 checkpoint_file=None, max_attempts=2):
+        if sessions < 1:
+            raise ValueError("sessions must be at least 1")
+        self.processor = BrandMentionProcessor()
+        self.lock = threading.Lock()  # guards self.processor and the stats below
+        self.checkpoint_file = checkpoint_file
+        self.max_attempts = max_attempts  # tries per prompt before giving up on it
+        self.failed_prompts = []
+        self.session_stats = {}
+        self.source_lock = threading.Lock()  # guards the shared prompt iterator
+        self.prompts_started = 0
+        self.source_exhausted = False
+
+        self.scrapers = [
+            GPTScrapper(
+                delay=delay,
+                response_timeout=response_timeout,
+                stable_ms=stable_ms,
+                input_mode=input_mode,
+                debug_port=base_port + i,
+                user_data_dir=f"{user_data_root}-{i}",
+                processor=self.processor
+            )
+            for i in range(sessions)
+        ]
+        for scraper in self.scrapers:
+            scraper.pause_on_missing_input = False  # no input() from worker threads - re-queue instead
+
+        print(f" SCRAPER POOL: {sessions} sessions on ports {base_port}-{base_port + sessions - 1}")
+
+    def start_sessions(self, launch=True):
+        """
+        Launch (or, with launch=False, attach to already running) Chrome
+        sessions and connect Selenium to each one. Sessions that fail to
+        connect are dropped. Returns the number of live sessions.
+        """
+        if launch:
+            # Kill old Chrome once up front - per-session pkill would kill the other sessions
+            subprocess.run(["pkill", "-f", "Chrome"], capture_output=True)
+            time.sleep(1)
+            for scraper in self.scrapers:
+                scraper.setup_chrome_debug_session(kill_existing=False, wait_for_login=False)
+
+            print(f"\n   Please log in to ChatGPT in each of the {len(self.scrapers)} Chrome windows")
+            input("   Press Enter when every window is logged in and ready...")
+
+        connected = []
+        for scraper in self.scrapers:
+            if scraper.connect_to_chatgpt_session(scraper.debug_port):
+                connected.append(scraper)
+            else:
+                print(f"   ⚠️ Dropping session on port {scraper.debug_port}")
+        self.scrapers = connected
+        return len(connected)
+
+    def record_response(self, prompt, response):
+        """Feed one answer into the shared processor (called from the worker threads)"""
+        with self.lock:
+            return self.processor.process_response(prompt, response)
+
+    def _next_work(self, work, source):
+        """(prompt, attempt): a queued retry first, else the next fresh prompt. None when both ran out"""
+        try:
+            return work.get_nowait()
+        except queue.Empty:
+            pass
+        with self.source_lock:
+            prompt = next(source, None)
+            if prompt is None:
+                self.source_exhausted = True
+                return None
+            self.prompts_started += 1
+        return prompt, 1
+
+    def _session_worker(self, scraper, work, source):
+        """Pull prompts until the retry queue and the prompt source are empty or the session dies"""
+        port = scraper.debug_port
+        stats = {"completed": 0, "failed": 0, "busy_time": 0.0}
+        consecutive_failures = 0
+
+        while consecutive_failures < MAX_CONSECUTIVE_FAILURES:
+            item = self._next_work(work, source)
+            if item is None:
+                break
+            prompt, attempt = item
+
+            prompt_start = time.time()
+            print(f"\n📝 [port {port}] {prompt[:60]}...")
+            try:
+                response = scraper.scrape_prompt(prompt)
+            except Exception as e:
+                print(f"   ⚠️ [port {port}] Session error: {e}")
+                response = None
+            stats["busy_time"] += time.time() - prompt_start
+
+            if response:
+                result = self.record_response(prompt, response)
+                print(f"   📊 [port {port}] Brands found: {result['brand_mentions']}")
+                stats["completed"] += 1
+                consecutive_failures = 0
+            else:
+                stats["failed"] += 1
+                consecutive_failures += 1
+                if attempt < self.max_attempts:
+                    work.put((prompt, attempt + 1))  # another session can pick it up
+                else:
+                    with self.lock:
+                        self.failed_prompts.append(prompt)
+
+            time.sleep(random.uniform(scraper.delay, scraper.delay + 2))
+
+        if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+            print(f"   ❌ [port {port}] {consecutive_failures} failures in a row - retiring session")
+
+        with self.lock:
+            self.session_stats[port] = stats
+
+    def run(self, prompts=None):
+        """
+        Scrape every prompt across the connected sessions. Call start_sessions()
+        first. Returns the shared BrandMentionProcessor.
+        """
+        if not self.scrapers:
+            print("❌ No connected sessions")
+            return self.processor
+
+        # Iterated lazily: a big PromptCatalog is never loaded into memory
+        prompts = prompts if prompts is not None else get_prompts()
+        total_prompts = known_prompt_count(prompts)
+
+        resume = bool(self.checkpoint_file) and os.path.exists(self.checkpoint_file)
+        checkpoint_file = self.checkpoint_file or f"brand_mentions_results_{int(time.time())}.jsonl"
+        completed_prompts = open_checkpoint(self.processor, checkpoint_file, resume=resume)
+        self.checkpoint_file = checkpoint_file
+        print(f"📝 Checkpoint log: {checkpoint_file}")
+
+        if completed_prompts:
+            prompts = (prompt for prompt in prompts if prompt not in completed_prompts)
+            total_prompts = None
+            print(f"⏭️ Resuming: skipping {len(completed_prompts)} completed prompts")
+
+        source = iter(prompts)
+        work = queue.Queue()  # (prompt, attempt) waiting for a retry
+        self.prompts_started = 0
+        self.source_exhausted = False
+
+        scope = f"{total_prompts} prompts" if total_prompts is not None else "prompts"
+        print(f"\n🚀 Scraping {scope} with {len(self.scrapers)} sessions...")
+        start_time = time.time()
+
+        threads = [
+            threading.Thread(target=self._session_worker, args=(scraper, work, source), daemon=True)
+            for scraper in self.scrapers
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.processor.response_writer.close()
+
+        # Retries still queued if every session was retired early
+        while not work.empty():
+            self.failed_prompts.append(work.get_nowait()[0])
+
+        total_time = time.time() - start_time
+        completed = sum(stats["completed"] for stats in self.session_stats.values())
+        print(f"\n🎉 POOL SCRAPING COMPLETE!")
+        print(f"   ✅ Success rate: {completed}/{self.prompts_started}")
+        print(f"   ⏱️ Total time: {total_time:.1f}s ({total_time/60:.1f} minutes)")
+        print(f"   📈 Throughput: {completed / max(total_time, 1e-9) * 60:.1f} prompts/minute")
+        for port, stats in sorted(self.session_stats.items()):
+            print(f"   🖥️ Port {port}: {stats['completed']} done, {stats['failed']} failed, "
+                  f"busy {stats['busy_time']:.1f}s")
+        if self.failed_prompts:
+            print(f"   ⚠️ {len(self.failed_prompts)} prompts failed - rerun with --checkpoint {checkpoint_file}")
+        if not self.source_exhausted:
+            print(f"   ⚠️ Every session was retired before the last prompt - rerun with --checkpoint {checkpoint_file}")
+
+        if self.processor.processed_data:
+            self.processor.print_detailed_summary()
+            filename = os.path.splitext(checkpoint_file)[0] + ".json"
+            self.processor.save_to_json(filename)
+            print(f"💾 Saved: {filename}")
+
+        return self.processor
+
+    def close(self):
+        for scraper in self.scrapers:
+            if scraper.driver:
+                scraper.driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape ChatGPT brand mentions with several browser sessions")
+    parser.add_argument("--sessions", type=int, default=2, help="number of Chrome sessions")
+    parser.add_argument("--base-port", type=int, default=DEFAULT_DEBUG_PORT, help="debug port of the first session")
+    parser.add_argument("--attach", action="store_true",
+                        help="attach to Chrome sessions already running on the ports instead of launching them")
+    parser.add_argument("--input-mode", choices=INPUT_MODES, default="fast")
+    parser.add_argument("--delay", type=float, default=3, help="seconds between prompts per session")
+    parser.add_argument("--checkpoint", default=None, help=".jsonl checkpoint log to resume from")
+    parser.add_argument("--catalog", action="store_true", help="use the full prompt catalog (templates expanded)")
+    parser.add_argument("--prompt-file", action="append", default=[], help="extra .txt/.jsonl prompt file (implies --catalog)")
+    parser.add_argument("--shard", default=None, help="only this machine's share of the catalog, e.g. 0/4")
+    args = parser.parse_args()
+
+    pool = ScraperPool(
+        sessions=args.sessions,
+        base_port=args.base_port,
+        delay=args.delay,
+        input_mode=args.input_mode,
+        checkpoint_file=args.checkpoint
+    )
+    if not pool.start_sessions(launch=not args.attach):
+        print("❌ Could not connect to any Chrome session")
+        return
+
+    try:
+        pool.run(select_prompts(args.catalog, args.prompt_file, args.shard))
+    finally:
+        print("\n🔒 Keeping browsers open for inspection...")
+        input("Press Enter to close browsers...")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from webdriver_manager.chrome import ChromeDriverManager
 
 from prompts import get_prompts
 from data_processor import BrandMentionProcessor
+from chatgpt_page import count_assistant_turns, extract_last_response, wait_for_response_completion
 
 
 class ChatGPTScraper:
@@ -19,6 +20,7 @@ class ChatGPTScraper:
         self.delay = delay
         self.driver = None  # Will hold our browser controller
         self.processor = BrandMentionProcessor()  # Our text analyzer
+        self.turns_before_submit = 0  # Assistant messages on the page before the last prompt
         
         print(f"Scraper created:")
         print(f" Headless mode: {headless}")
@@ -281,6 +283,9 @@ class ChatGPTScraper:
                     
                     time.sleep(1)
                     
+                    # Remember how many answers exist, so extract_response waits for a new one
+                    self.turns_before_submit = count_assistant_turns(self.driver)
+                    
                     # Submit the prompt
                     success = False
                     try:
@@ -337,52 +342,22 @@ class ChatGPTScraper:
         print("\n📖 Extracting ChatGPT response...")
         
         try:
-            # Wait for response to appear and finish
-            time.sleep(10)  # Wait for response to complete
-            
-            # Common selectors for ChatGPT responses
-            response_selectors = [
-                "div[data-message-author-role='assistant']",
-                ".markdown",
-                "div.min-h-\\[20px\\]",  # Common ChatGPT response container
-                "div[data-testid*='conversation']",
-            ]
-            
-            for selector in response_selectors:
-                try:
-                    print(f"   Trying response selector: {selector}")
-                    
-                    # Find all response elements
-                    response_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    
-                    if response_elements:
-                        # Get the last response (most recent)
-                        last_response = response_elements[-1]
-                        response_text = last_response.text.strip()
-                        
-                        if response_text and len(response_text) > 10:  # Make sure it's not empty
-                            print(f"   ✅ Found response ({len(response_text)} characters)")
-                            print(f"   Preview: {response_text[:100]}...")
-                            return response_text
-                    
-                except Exception as e:
-                    print(f"   ❌ Selector failed: {e}")
-                    continue
-            
-            # Fallback: try to get any text from the page
-            print("   🔄 Trying fallback: searching page text...")
-            page_text = self.driver.find_element(By.TAG_NAME, "body").text
+            # Wait until the new answer stops streaming (returns early for short answers)
+            response_text = wait_for_response_completion(self.driver, self.turns_before_submit)
+            if response_text:
+                print(f"   ✅ Found response ({len(response_text)} characters)")
+                print(f"   Preview: {response_text[:100]}...")
+                return response_text
             
-            # Look for response patterns
-            lines = page_text.split('\n')
-            for i, line in enumerate(lines):
-                if len(line) > 50 and any(word in line.lower() for word in ['recommend', 'suggest', 'best', 'good', 'great']):
-                    # Found a potential response line, get a few lines around it
-                    response_lines = lines[max(0, i-2):i+5]
-                    response_text = '\n'.join(response_lines).strip()
-                    if len(response_text) > 50:
-                        print(f"   ✅ Found response via fallback ({len(response_text)} characters)")
-                        return response_text
+            # Fallback: whatever the last answer on the page is, in one round-trip
+            print("   🔄 Trying fallback: reading the last answer on the page...")
+            details = extract_last_response(self.driver)
+            if details and len(details["text"]) > 10:
+                print(f"   ✅ Found response via {details['selector']} ({len(details['text'])} characters)")
+                if details["streaming"]:
+                    print("   ⚠️ ChatGPT still seems to be writing - response may be cut short")
+                print(f"   Preview: {details['text'][:100]}...")
+                return details["text"]
             
             print("   ❌ Could not extract response")
             return None
@@ -0,0 +1,114 @@
+"""
+BENCHMARKS - data loader throughput (brand_mentions rows per second)
+
+Loads synthetic mention rows with the old one-ORM-object-per-row path and
+with the bulk paths (batched executemany, and COPY on PostgreSQL).
+
+Run from the stage2_api directory:
+    python benchmarks.py                          # 1M rows into a temp SQLite file
+    BENCH_POSTGRES_URL=postgresql://... python benchmarks.py   # ...and into Postgres
+    python benchmarks.py --rows 200000 --batch-size 10000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, BrandMention
+from data_loader import MENTION_COLUMNS, bulk_load_rows, iter_mention_rows
+
+BRANDS = ["Nike", "Adidas", "Hoka", "New Balance", "Jordan"]
+
+
+def make_response_analysis(mention_rows, seed=3):
+    """Synthetic comprehensive_analysis.response_analysis with ~mention_rows mention rows"""
+    rng = random.Random(seed)
+    responses = []
+    rows = 0
+    while rows < mention_rows:
+        breakdown = {brand: rng.choice((0, 1, 1, 2, 3)) for brand in BRANDS}
+        rows += sum(1 for count in breakdown.values() if count)
+        responses.append({
+            "response_number": len(responses) + 1,
+            "prompt": f"What are the best running shoes for runner #{len(responses)}?",
+            "response_length": rng.randint(500, 4000),
+            "brand_breakdown": breakdown,
+        })
+    return responses
+
+
+def legacy_load(db, response_analysis):
+    """The original loader: one BrandMention object per row, one big commit"""
+    for row in iter_mention_rows(response_analysis):
+        db.add(BrandMention(**row))
+    db.commit()
+
+
+def bulk_load(db, response_analysis, batch_size, use_copy):
+    bulk_load_rows(
+        db, BrandMention.__table__, MENTION_COLUMNS, iter_mention_rows(response_analysis),
+        batch_size=batch_size, use_copy=use_copy
+    )
+    db.commit()
+
+
+def _fresh_session(url):
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def run_method(name, url, response_analysis, load):
+    engine, db = _fresh_session(url)
+    try:
+        start = time.perf_counter()
+        load(db)
+        elapsed = time.perf_counter() - start
+        rows = db.query(BrandMention).count()
+    finally:
+        db.close()
+        engine.dispose()
+    print(f"   🔸 {name:<28} {rows:>9,} rows  {elapsed:8.2f}s  {rows / elapsed:>10,.0f} rows/s")
+
+
+def benchmark_database(label, url, rows, legacy_rows, batch_size):
+    print(f"\n⏱️ {label}")
+    print("=" * 60)
+    response_analysis = make_response_analysis(rows)
+    legacy_analysis = make_response_analysis(legacy_rows)
+
+    run_method("ORM add() per row (old)", url, legacy_analysis, lambda db: legacy_load(db, legacy_analysis))
+    run_method(f"executemany x{batch_size}", url, response_analysis,
+               lambda db: bulk_load(db, response_analysis, batch_size, use_copy=False))
+    if url.startswith("postgresql"):
+        run_method(f"COPY FROM STDIN x{batch_size}", url, response_analysis,
+                   lambda db: bulk_load(db, response_analysis, batch_size, use_copy=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the brand_mentions bulk load paths")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="mention rows for the bulk paths")
+    parser.add_argument("--legacy-rows", type=int, default=100_000,
+                        help="mention rows for the (slow) per-row ORM path")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        benchmark_database("SQLite", sqlite_url, args.rows, args.legacy_rows, args.batch_size)
+
+    postgres_url = os.getenv("BENCH_POSTGRES_URL")
+    if postgres_url:
+        benchmark_database("PostgreSQL", postgres_url, args.rows, args.legacy_rows, args.batch_size)
+    else:
+        print("\n(set BENCH_POSTGRES_URL to also benchmark PostgreSQL and COPY)")
+
+
+if __name__ == "__main__":
+    main()
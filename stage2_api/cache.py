@@ -0,0 +1,152 @@
+"""
+In-process read-through cache for the /mentions endpoints
+
+Brand summaries only change when data_loader runs, yet every request used
+to query brand_summaries, build Pydantic models and sort them. The cache
+keeps, for the current data version:
+
+- the serialized /mentions payload (JSON bytes, served as-is)
+- a per-brand map: brand_key -> serialized /mentions/{brand} and
+  /mentions/{brand}/details payloads. Brands are looked up one at a time
+  (index seek on brand_key) and remembered, misses included; building the
+  /mentions payload fills in every brand at once.
+
+The loader bumps the data_version row in the same transaction as a load.
+The cache reads that counter at most once per check_interval seconds and
+drops everything when it has moved, so between checks requests don't
+touch the database at all. ttl_seconds (optional) additionally forces a
+refresh after that long, whatever the version says.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from database import BrandSummary, brand_key, find_brand_summary, get_data_version
+from models import BrandMentionResponse, BrandSummaryResponse, SingleBrandResponse
+
+# Seconds between data_version checks, and optional hard TTL (0 = none)
+DEFAULT_CHECK_INTERVAL = float(os.getenv("MENTIONS_CACHE_CHECK_INTERVAL", "1.0"))
+DEFAULT_TTL = float(os.getenv("MENTIONS_CACHE_TTL", "0")) or None
+
+# Unknown brands are remembered too, up to this many map entries
+MAX_BRAND_ENTRIES = 100_000
+
+NO_DATA = object()  # /mentions payload marker: data version checked, brand_summaries empty
+
+
+def brand_payloads(brand: BrandMentionResponse):
+    """(/mentions/{brand} bytes, /mentions/{brand}/details bytes) for one brand"""
+    return (
+        SingleBrandResponse(brand=brand.brand, total_mentions=brand.total_mentions).model_dump_json().encode(),
+        brand.model_dump_json().encode()
+    )
+
+
+def build_mentions_payload(db: Session):
+    """
+    Query brand_summaries once and serialize /mentions. Returns (payload,
+    brand map), or (NO_DATA, {}) when nothing is loaded.
+    """
+    brand_summaries = db.query(BrandSummary).all()
+    if not brand_summaries:
+        return NO_DATA, {}
+
+    brand_responses = [BrandMentionResponse.model_validate(brand) for brand in brand_summaries]
+    # Keyed by the stored brand_key, like find_brand_summary: case duplicates an
+    # old database left without a key are listed in /mentions but never looked up
+    brands = {
+        row.brand_key: brand_payloads(brand)
+        for row, brand in zip(brand_summaries, brand_responses) if row.brand_key is not None
+    }
+
+    # Sort by total mentions (descending)
+    brand_responses.sort(key=lambda x: x.total_mentions, reverse=True)
+
+    summary = BrandSummaryResponse(
+        total_mentions=sum(brand.total_mentions for brand in brand_responses),
+        total_responses=max(brand.total_responses for brand in brand_responses),
+        analysis_date=brand_summaries[0].last_updated or datetime.now(),
+        brands=brand_responses
+    )
+    return summary.model_dump_json().encode(), brands
+
+
+class MentionsCache:
+    """
+    Serialized /mentions payloads for the current data version.
+    
+    Queries run without holding the lock (with DB_ASYNC, run_sync switches
+    to other requests mid-query on the same thread); the lock only guards
+    swapping results in, and results computed for an older version are
+    dropped.
+    """
+
+    def __init__(self, check_interval=DEFAULT_CHECK_INTERVAL, ttl_seconds=DEFAULT_TTL):
+        self.check_interval = check_interval
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self.built_at = 0.0
+        self.checked_at = 0.0
+        self.payload = None  # None = not built yet
+        self.brands = {}
+        self.complete = False  # brands holds every brand (the payload was built)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _refresh(self, db: Session):
+        """Drop the cached data if the data version moved or the TTL ran out. Returns the version"""
+        now = time.monotonic()
+        expired = self.ttl_seconds is not None and now - self.built_at >= self.ttl_seconds
+        if self.version is not None and now - self.checked_at < self.check_interval and not expired:
+            return self.version
+
+        version = get_data_version(db)
+        with self.lock:
+            self.checked_at = time.monotonic()
+            if version != self.version or expired:
+                self.version = version
+                self.built_at = self.checked_at
+                self.payload = None
+                self.brands = {}
+                self.complete = False
+        return version
+
+    def get_mentions(self, db: Session):
+        """Serialized /mentions payload, or None when no data is loaded"""
+        version = self._refresh(db)
+        payload = self.payload
+        if payload is None:
+            self.misses += 1
+            payload, brands = build_mentions_payload(db)
+            with self.lock:
+                if self.version == version:
+                    self.payload, self.brands, self.complete = payload, brands, True
+        else:
+            self.hits += 1
+        return None if payload is NO_DATA else payload
+
+    def get_brand(self, db: Session, brand: str):
+        """(/mentions/{brand}, /mentions/{brand}/details) payloads, or None for an unknown brand"""
+        key = brand_key(brand)
+        version = self._refresh(db)
+        brands = self.brands
+        if key in brands or self.complete:
+            self.hits += 1
+            return brands.get(key)
+
+        self.misses += 1
+        brand_summary = find_brand_summary(db, brand)
+        payloads = brand_payloads(BrandMentionResponse.model_validate(brand_summary)) if brand_summary else None
+        with self.lock:
+            if self.version == version and len(self.brands) < MAX_BRAND_ENTRIES:
+                self.brands[key] = payloads
+        return payloads
+
+    def invalidate(self):
+        with self.lock:
+            self.version = None
@@ -2,16 +2,41 @@
 Data loader to import brand mention data from JSON into SQLite
 """
 
+import csv
+import hashlib
+import io
 import json
 import os
+import sys
+import time
 from datetime import datetime
+from itertools import islice
 from sqlalchemy.orm import Session
-from database import SessionLocal, create_tables, BrandMention, BrandSummary
+from sqlalchemy.sql import func
+from database import (
+    SessionLocal, create_tables, bump_data_version, reset_record_count, get_total_records,
+    has_untracked_data, brand_key, BrandMention, BrandSummary, IngestedRun, IngestedResponse
+)
 import logging
 
+try:
+    import ijson  # optional - streams large result files instead of json.load
+except ImportError:
+    ijson = None
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT batch / COPY chunk
+DEFAULT_BATCH_SIZE = int(os.getenv("LOADER_BATCH_SIZE", "5000"))
+
+MENTION_COLUMNS = ["brand", "count", "prompt_id", "prompt_text", "response_text", "response_length", "run_id"]
+
 
 def load_json_data(json_file_path: str) -> dict:
     """Load and validate JSON data from scraper output"""
@@ -42,12 +67,110 @@ def load_json_data(json_file_path: str) -> dict:
         raise
 
 
-def clear_existing_data(db: Session):
-    """Clear existing data from database tables"""
+def iter_jsonl_responses(jsonl_file_path: str):
+    """
+    Yield response_analysis-shaped items from a JSONL results file (the
+    checkpoint log / JsonlResponseWriter format, one response per line).
+    A torn last line from a crashed run is skipped.
+    """
+    with open(jsonl_file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"⚠️  Skipping unreadable line {line_number} of {jsonl_file_path}")
+                continue
+            yield {
+                "response_number": record["response_number"],
+                "prompt": record["prompt"],
+                "response_length": record["response_length"],
+                "total_mentions": record.get("total_mentions"),
+                "brand_breakdown": record["brand_mentions"],
+                "timestamp": record.get("timestamp")
+            }
+
+
+def iter_json_items(json_file_path: str, prefix: str):
+    """Stream the values at an ijson prefix (e.g. 'comprehensive_analysis.response_analysis.item')"""
+    with open(json_file_path, 'rb') as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def _iter_streamed_responses(json_file_path: str):
+    found = False
+    for response_data in iter_json_items(json_file_path, 'comprehensive_analysis.response_analysis.item'):
+        found = True
+        yield response_data
+    
+    if not found:
+        # Saved with save_to_json(jsonl_path=...): responses live in a JSONL file next to it
+        responses_file = next(iter_json_items(json_file_path, 'responses_file'), None)
+        if responses_file:
+            yield from iter_jsonl_responses(os.path.join(os.path.dirname(json_file_path), responses_file))
+
+
+def open_result_file(json_file_path: str):
+    """
+    Open a scraper result file for loading without reading it into memory.
+    Returns (brands, responses): the brand names from its brand_analysis and
+    an iterator over its response_analysis items.
+    
+    - .jsonl: checkpoint / JsonlResponseWriter records, read line by line
+    - .json: the save_to_json document, streamed with ijson when it is
+      installed (falls back to json.load otherwise)
+    """
+    if not os.path.exists(json_file_path):
+        logger.error(f"❌ JSON file not found: {json_file_path}")
+        raise FileNotFoundError(json_file_path)
+    
+    if json_file_path.endswith('.jsonl'):
+        logger.info(f"✅ Streaming JSONL responses from {json_file_path}")
+        return [], iter_jsonl_responses(json_file_path)
+    
+    if ijson is None:
+        logger.warning("⚠️  ijson not installed - reading the whole file into memory (pip install ijson)")
+        data = load_json_data(json_file_path)
+        analysis = data['comprehensive_analysis']
+        responses = analysis.get('response_analysis')
+        if responses is None and data.get('responses_file'):
+            responses = iter_jsonl_responses(
+                os.path.join(os.path.dirname(json_file_path), data['responses_file'])
+            )
+        return list(analysis.get('brand_analysis', {})), iter(responses or [])
+    
+    summary = next(iter_json_items(json_file_path, 'summary'), None)
+    if summary is None:
+        raise ValueError("Missing required field: summary")
+    brand_analysis = next(iter_json_items(json_file_path, 'comprehensive_analysis.brand_analysis'), {})
+    
+    logger.info(f"✅ Streaming JSON data from {json_file_path}")
+    logger.info(f"   Total responses: {summary['total_responses_processed']}")
+    logger.info(f"   Total mentions: {summary['grand_total_mentions']}")
+    return list(brand_analysis), _iter_streamed_responses(json_file_path)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def clear_existing_data(db: Session, commit: bool = True):
+    """Clear existing data (mentions, summaries and the ingestion history) from database tables"""
     try:
         db.query(BrandMention).delete()
         db.query(BrandSummary).delete()
-        db.commit()
+        db.query(IngestedResponse).delete()
+        db.query(IngestedRun).delete()
+        reset_record_count(db)
+        if commit:
+            bump_data_version(db)
+            db.commit()
         logger.info("🗑️  Cleared existing data from database")
     except Exception as e:
         db.rollback()
@@ -55,85 +178,229 @@ def clear_existing_data(db: Session):
         raise
 
 
-def load_brand_mentions(db: Session, data: dict):
-    """Load individual brand mentions into database"""
-    try:
-        mentions_added = 0
-        
-        # Extract response analysis from the new structure
-        response_analysis = data['comprehensive_analysis']['response_analysis']
+def file_content_hash(file_path: str) -> str:
+    """sha256 of a result file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def response_key(response_data: dict, content_hash: str) -> str:
+    """
+    Identity of one scraped response: prompt + scrape timestamp, so the same
+    answer showing up in two result files is only loaded once. Responses
+    without a timestamp fall back to their position in this file.
+    """
+    timestamp = response_data.get('timestamp')
+    if timestamp:
+        material = f"{response_data['prompt']}\x1f{timestamp}"
+    else:
+        material = f"{content_hash}\x1f{response_data['response_number']}"
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def iter_mention_rows(response_analysis, run_id: int = None):
+    """Yield one brand_mentions row (dict) per brand mentioned in each response"""
+    for response_data in response_analysis:
+        prompt_id = response_data['response_number']
+        prompt_text = response_data['prompt']
+        response_length = response_data['response_length']
         
-        for response_data in response_analysis:
-            prompt_id = response_data['response_number']
-            prompt_text = response_data['prompt']
-            response_length = response_data['response_length']
-            
-            # For SQLite, we'll use a placeholder response text since it's not in the summary
-            response_text = f"Response to: {prompt_text} (Length: {response_length} chars)"
-            
-            # Extract brand mentions from this response
-            for brand, count in response_data['brand_breakdown'].items():
-                if count > 0:  # Only add if brand was mentioned
-                    mention = BrandMention(
-                        brand=brand,
-                        count=count,
-                        prompt_id=prompt_id,
-                        prompt_text=prompt_text,
-                        response_text=response_text,
-                        response_length=response_length
-                    )
-                    db.add(mention)
-                    mentions_added += 1
-        
-        db.commit()
-        logger.info(f"✅ Added {mentions_added} brand mention records")
+        # For SQLite, we'll use a placeholder response text since it's not in the summary
+        response_text = f"Response to: {prompt_text} (Length: {response_length} chars)"
         
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Error loading brand mentions: {e}")
-        raise
+        # Extract brand mentions from this response
+        for brand, count in response_data['brand_breakdown'].items():
+            if count > 0:  # Only add if brand was mentioned
+                yield {
+                    "brand": brand,
+                    "count": count,
+                    "prompt_id": prompt_id,
+                    "prompt_text": prompt_text,
+                    "response_text": response_text,
+                    "response_length": response_length,
+                    "run_id": run_id
+                }
+
 
+def _batches(rows, batch_size: int):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
 
-def load_brand_summaries(db: Session, data: dict):
-    """Load aggregated brand summaries into database"""
+
+def insert_rows(db: Session, table, rows, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Insert dict rows with Core executemany, batch_size rows per round-trip"""
+    inserted = 0
+    statement = table.insert()
+    for batch in _batches(rows, batch_size):
+        db.execute(statement, batch)
+        inserted += len(batch)
+    return inserted
+
+
+def copy_rows(db: Session, table, columns, rows, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """PostgreSQL only: stream rows with COPY FROM STDIN (CSV), batch_size rows per chunk"""
+    # Raw psycopg2 connection of the session, so COPY is part of the same transaction
+    cursor = db.connection().connection.cursor()
+    copy_sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    copied = 0
     try:
-        summaries_added = 0
-        total_mentions = data['summary']['grand_total_mentions']
-        total_responses = data['summary']['total_responses_processed']
-        
-        # Extract brand analysis from the new structure
-        brand_analysis = data['comprehensive_analysis']['brand_analysis']
-        
-        for brand, brand_data in brand_analysis.items():
-            brand_total = brand_data['total_mentions']
-            
-            # Calculate metrics from the data
-            avg_mentions = brand_data['avg_per_response']
-            max_mentions = brand_data['max_in_single_response']
-            percentage = brand_data['percentage']
-            
-            summary = BrandSummary(
-                brand=brand,
-                total_mentions=brand_total,
-                total_responses=total_responses,
-                avg_mentions_per_response=round(avg_mentions, 2),
-                max_mentions_single_response=max_mentions,
-                percentage_of_total=round(percentage, 2)
-            )
-            db.add(summary)
-            summaries_added += 1
+        for batch in _batches(rows, batch_size):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in batch:
+                writer.writerow([row[column] for column in columns])
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+            copied += len(batch)
+    finally:
+        cursor.close()
+    return copied
+
+
+def bulk_load_rows(db: Session, table, columns, rows, batch_size: int = DEFAULT_BATCH_SIZE, use_copy=None) -> int:
+    """
+    Bulk insert rows: COPY on PostgreSQL, batched executemany elsewhere.
+    use_copy=None picks automatically from the session's database.
+    """
+    if use_copy is None:
+        use_copy = db.get_bind().dialect.name == "postgresql"
+    if use_copy:
+        return copy_rows(db, table, columns, rows, batch_size)
+    return insert_rows(db, table, rows, batch_size)
+
+
+def iter_new_responses(db: Session, response_analysis, run_id: int, content_hash: str,
+                       batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Yield only the responses that aren't in the database yet, recording
+    their keys under run_id as they go. One key lookup per batch.
+    """
+    for batch in _batches(response_analysis, batch_size):
+        keyed = {}
+        for response_data in batch:
+            keyed.setdefault(response_key(response_data, content_hash), response_data)
         
-        db.commit()
-        logger.info(f"✅ Added {summaries_added} brand summary records")
+        loaded = {
+            key for (key,) in db.query(IngestedResponse.response_key)
+            .filter(IngestedResponse.response_key.in_(list(keyed)))
+        }
+        new_keys = [key for key in keyed if key not in loaded]
+        if not new_keys:
+            continue
         
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Error loading brand summaries: {e}")
-        raise
+        db.execute(IngestedResponse.__table__.insert(),
+                   [{"response_key": key, "run_id": run_id} for key in new_keys])
+        for key in new_keys:
+            yield keyed[key]
+
+
+def tally_mentions(rows, brand_totals: dict, brand_max: dict):
+    """Pass mention rows through, keeping per-brand totals and max for the summary update"""
+    for row in rows:
+        brand, count = row["brand"], row["count"]
+        brand_totals[brand] = brand_totals.get(brand, 0) + count
+        brand_max[brand] = max(brand_max.get(brand, 0), count)
+        yield row
+
+
+def apply_summary_deltas(db: Session, brands, new_responses: int, brand_totals: dict, brand_max: dict):
+    """
+    Fold one run's counts into brand_summaries. Works on the summary rows
+    only (one per brand), never rescans brand_mentions.
+    """
+    rows = db.query(BrandSummary).with_for_update().all()
+    previous_responses = max((summary.total_responses for summary in rows), default=0)
+    
+    # One summary per brand_key: "adidas" counts go to an existing "Adidas" row
+    # (brand_key is unique). Rows without a key are case duplicates left by an
+    # old database - they keep their counts until a rebuild.
+    summaries = {summary.brand_key: summary for summary in rows if summary.brand_key is not None}
+    key_totals, key_max = {}, {}
+    for brand, total in brand_totals.items():
+        key = brand_key(brand)
+        key_totals[key] = key_totals.get(key, 0) + total
+        key_max[key] = max(key_max.get(key, 0), brand_max.get(brand, 0))
+    
+    for brand in list(brands) + list(brand_totals):
+        key = brand_key(brand)
+        if key not in summaries:
+            summaries[key] = BrandSummary(brand=brand, total_mentions=0, max_mentions_single_response=0)
+            db.add(summaries[key])
+            rows.append(summaries[key])
+    
+    total_responses = previous_responses + new_responses
+    for key, summary in summaries.items():
+        summary.total_mentions += key_totals.get(key, 0)
+        summary.max_mentions_single_response = max(summary.max_mentions_single_response,
+                                                   key_max.get(key, 0))
+    for summary in rows:
+        summary.total_responses = total_responses
+    
+    grand_total = sum(summary.total_mentions for summary in rows)
+    for summary in rows:
+        avg_mentions = summary.total_mentions / total_responses if total_responses else 0.0
+        percentage = summary.total_mentions / grand_total * 100 if grand_total else 0.0
+        summary.avg_mentions_per_response = round(avg_mentions, 2)
+        summary.percentage_of_total = round(percentage, 2)
+        summary.last_updated = func.now()
+    
+    return len(rows)
+
+
+def ingest_run(db: Session, brands, responses, source_file: str, content_hash: str,
+               batch_size: int = DEFAULT_BATCH_SIZE, use_copy=None) -> IngestedRun:
+    """
+    Load one result file's new responses: record the run, bulk insert the
+    mentions of responses not seen before and update the summaries.
+    responses is consumed once, in batches, so memory stays flat however
+    big the file is. Nothing is committed here - the caller commits the
+    whole run at once.
+    """
+    run = IngestedRun(source_file=source_file, content_hash=content_hash)
+    db.add(run)
+    db.flush()  # assigns run.id
+    
+    brands = set(brands)
+    seen = {"responses": 0, "new": 0}
+    brand_totals, brand_max = {}, {}
+    
+    def all_responses():
+        for response_data in responses:
+            seen["responses"] += 1
+            brands.update(response_data['brand_breakdown'])
+            yield response_data
+    
+    def new_responses():
+        for response_data in iter_new_responses(db, all_responses(), run.id, content_hash, batch_size):
+            seen["new"] += 1
+            yield response_data
+    
+    mention_rows = tally_mentions(iter_mention_rows(new_responses(), run.id), brand_totals, brand_max)
+    run.mentions_loaded = bulk_load_rows(
+        db, BrandMention.__table__, MENTION_COLUMNS, mention_rows,
+        batch_size=batch_size, use_copy=use_copy
+    )
+    run.responses_loaded = seen["new"]
+    
+    skipped = seen["responses"] - seen["new"]
+    if skipped:
+        logger.info(f"⏭️  Skipped {skipped} responses already in the database")
+    logger.info(f"✅ Added {run.mentions_loaded} brand mention records from {run.responses_loaded} new responses")
+    
+    summaries = apply_summary_deltas(db, sorted(brands), run.responses_loaded, brand_totals, brand_max)
+    logger.info(f"✅ Updated {summaries} brand summary records")
+    return run
 
 
 def find_latest_json_file() -> str:
-    """Find the most recent JSON file from the scraper"""
+    """Find the most recent JSON (or JSONL) result file from the scraper"""
     try:
         # Look in stage1_scraper directory
         stage1_dir = "../stage1_scraper"
@@ -142,7 +409,7 @@ def find_latest_json_file() -> str:
         
         json_files = []
         for file in os.listdir(stage1_dir):
-            if file.endswith('.json') and ('brand_mentions' in file or 'results' in file):
+            if file.endswith(('.json', '.jsonl')) and ('brand_mentions' in file or 'results' in file):
                 file_path = os.path.join(stage1_dir, file)
                 file_stat = os.stat(file_path)
                 json_files.append((file_path, file_stat.st_mtime))
@@ -162,10 +429,22 @@ def find_latest_json_file() -> str:
         raise
 
 
-def load_data_to_database(json_file_path: str = None, clear_existing: bool = True):
-    """Main function to load data from JSON into SQLite"""
+def load_data_to_database(json_file_path: str = None, clear_existing: bool = False,
+                          batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Main function to load data from JSON into the database.
+    
+    Incremental by default: a file that was already loaded (same content
+    hash) is skipped, and only responses not yet in the database are added.
+    Each file is loaded in one transaction, so the API never sees a
+    half-loaded run. clear_existing=True rebuilds from this file alone
+    (still in one transaction). A database loaded by the old,
+    non-incremental loader has no ingestion history, so it is refused
+    until it has been rebuilt once.
+    Returns the IngestedRun id, or None if the file was already loaded.
+    """
     try:
-        # Create tables if they don't exist
+        # Create (and migrate) tables if needed
         create_tables()
         logger.info("📋 Database tables ready")
         
@@ -173,31 +452,56 @@ def load_data_to_database(json_file_path: str = None, clear_existing: bool = Tru
         if json_file_path is None:
             json_file_path = find_latest_json_file()
         
-        # Load JSON data
-        data = load_json_data(json_file_path)
+        content_hash = file_content_hash(json_file_path)
         
         # Create database session
         db = SessionLocal()
         
         try:
-            # Clear existing data if requested
             if clear_existing:
-                clear_existing_data(db)
+                clear_existing_data(db, commit=False)
+            elif has_untracked_data(db):
+                raise RuntimeError(
+                    "the database holds data loaded before incremental loading (no ingestion history), "
+                    "so adding to it would count those responses twice - "
+                    "reload once with: python data_loader.py <file> --rebuild"
+                )
+            else:
+                loaded_run = db.query(IngestedRun).filter(IngestedRun.content_hash == content_hash).first()
+                if loaded_run is not None:
+                    logger.info(f"⏭️  {json_file_path} already loaded (run {loaded_run.id}, "
+                                f"{loaded_run.loaded_at}) - nothing to do")
+                    return None
             
-            # Load brand mentions
-            load_brand_mentions(db, data)
+            # Open the result file (responses are streamed, not loaded up front)
+            brands, responses = open_result_file(json_file_path)
             
-            # Load brand summaries
-            load_brand_summaries(db, data)
+            start = time.perf_counter()
+            try:
+                run = ingest_run(db, brands, responses, os.path.abspath(json_file_path), content_hash,
+                                 batch_size=batch_size)
+                bump_data_version(db, run.mentions_loaded)  # tells the API to refresh its cache
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            elapsed = time.perf_counter() - start
             
-            logger.info("🎉 Data loading completed successfully!")
+            logger.info(f"🎉 Data loading completed successfully! (run {run.id})")
             
             # Print summary
-            total_mentions = db.query(BrandMention).count()
+            total_mentions = get_total_records(db)
             total_summaries = db.query(BrandSummary).count()
+            total_runs = db.query(IngestedRun).count()
             logger.info(f"📊 Database Summary:")
             logger.info(f"   - Brand mention records: {total_mentions}")
             logger.info(f"   - Brand summary records: {total_summaries}")
+            logger.info(f"   - Loaded result files: {total_runs}")
+            logger.info(f"   - Load time: {elapsed:.2f}s ({run.mentions_loaded / max(elapsed, 1e-9):,.0f} rows/sec)")
+            peak_rss = peak_rss_mb()
+            if peak_rss is not None:
+                logger.info(f"   - Peak RSS: {peak_rss:.1f} MB")
+            return run.id
             
         finally:
             db.close()
@@ -208,13 +512,16 @@ def load_data_to_database(json_file_path: str = None, clear_existing: bool = Tru
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
     
-    # Allow passing JSON file path as command line argument
-    json_file = sys.argv[1] if len(sys.argv) > 1 else None
+    parser = argparse.ArgumentParser(description="Load scraper results into the brand mentions database")
+    parser.add_argument("json_file", nargs="?", default=None, help=".json or .jsonl result file (default: latest in stage1_scraper)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="replace everything in the database with this file instead of adding to it")
+    args = parser.parse_args()
     
     try:
-        load_data_to_database(json_file)
+        load_data_to_database(args.json_file, clear_existing=args.rebuild)
     except Exception as e:
         logger.error(f"❌ Failed to load data: {e}")
-        sys.exit(1) 
\ No newline at end of file
+        sys.exit(1)
@@ -2,23 +2,192 @@
 Database configuration and models for Brand Mentions API
 """
 
+import logging
 import os
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Float
+import threading
+import time
+from sqlalchemy import create_engine, exc, inspect, text, bindparam, Column, Integer, String, DateTime, Text, Float
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.sql import func
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Database URL - Using PostgreSQL as required by Bear AI
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://ishanahluwalia@localhost:5432/brand_mentions")
 
+# DB_ASYNC=1: API handlers get an AsyncSession (asyncpg / aiosqlite) and await their queries
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
+# DB_INLINE=1: run plain-Session queries on the event loop, as handlers did before
+# run_db existed - only load_test.py --compare sets it, as the baseline to beat
+DB_INLINE = os.getenv("DB_INLINE", "0").lower() in ("1", "true", "yes")
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """The async-driver form of a database URL (ASYNC_DATABASE_URL overrides)"""
+    override = os.getenv("ASYNC_DATABASE_URL")
+    if override:
+        return override
+    scheme, separator, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+# Connection pool settings, per process: every uvicorn worker has its own pool,
+# so a worker can hold up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+# DB_MAX_CONNECTIONS (optional) is the budget for all WEB_CONCURRENCY workers
+# together and caps each worker's pool at its share.
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes"),
+    "statement_timeout_ms": int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")),
+    "workers": int(os.getenv("WEB_CONCURRENCY", "1")),
+    "max_connections": int(os.getenv("DB_MAX_CONNECTIONS", "0")),
+}
+
+
+class PoolMetrics:
+    """Checkout counts and connection wait times for one engine's pool"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+    
+    def record(self, wait, timed_out=False):
+        with self.lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+    
+    def snapshot(self):
+        with self.lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_total / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 3)
+            }
+
+
+def timed_pool_class(pool_class, metrics):
+    """pool_class, recording how long every checkout waited for a connection"""
+    class TimedPool(pool_class):
+        def _do_get(self):
+            # QueuePool's (internal) checkout: blocks while the pool is exhausted
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record(time.perf_counter() - start)
+            return connection
+    
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def engine_options(url: str, metrics: PoolMetrics, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine keyword arguments from POOL_SETTINGS"""
+    settings = POOL_SETTINGS
+    options = {"pool_pre_ping": settings["pool_pre_ping"]}
+    
+    if url.startswith("sqlite"):
+        # SQLite connections are opened and closed from different threads by FastAPI;
+        # SQLAlchemy picks its own (non-queue) pool for SQLite files
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+    
+    pool_size, max_overflow = settings["pool_size"], settings["max_overflow"]
+    if settings["max_connections"]:
+        per_worker = max(1, settings["max_connections"] // max(1, settings["workers"]))
+        pool_size = min(pool_size, per_worker)
+        max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+    
+    options.update(
+        poolclass=timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"]
+    )
+    
+    timeout_ms = settings["statement_timeout_ms"]
+    if timeout_ms and url.startswith("postgresql"):
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
 # SQLAlchemy setup
-engine = create_engine(DATABASE_URL)
+pool_metrics = PoolMetrics()
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, pool_metrics))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+async_pool_metrics = PoolMetrics()
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    
+    ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, async_pool_metrics, is_async=True)
+    )
+    AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def pool_status(engine, metrics: PoolMetrics) -> dict:
+    """Current state of an engine's connection pool plus its checkout metrics"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(0, pool.overflow())
+        )
+    status.update(metrics.snapshot())
+    return status
+
+
+def get_pool_metrics() -> dict:
+    """Pool metrics for this worker process (each uvicorn worker has its own pools)"""
+    metrics = {
+        "pid": os.getpid(),
+        "settings": dict(POOL_SETTINGS),
+        "sync": pool_status(engine, pool_metrics)
+    }
+    if async_engine is not None:
+        metrics["async"] = pool_status(async_engine.sync_engine, async_pool_metrics)
+    return metrics
+
 
 class BrandMention(Base):
     """Brand mention model for storing scraped data"""
@@ -31,15 +200,27 @@ class BrandMention(Base):
     prompt_text = Column(Text, nullable=False)
     response_text = Column(Text, nullable=False)
     response_length = Column(Integer, nullable=False)
+    run_id = Column(Integer, index=True, nullable=True)  # IngestedRun that loaded this row
     created_at = Column(DateTime, server_default=func.now())
 
 
+def brand_key(brand: str) -> str:
+    """Normalized brand name used for case-insensitive lookups"""
+    return brand.lower()
+
+
+def _brand_key_default(context):
+    return brand_key(context.get_current_parameters()["brand"])
+
+
 class BrandSummary(Base):
     """Aggregated brand summary for quick queries"""
     __tablename__ = "brand_summaries"
     
     id = Column(Integer, primary_key=True, index=True)
     brand = Column(String, unique=True, index=True, nullable=False)
+    # brand_key(brand), filled in on insert - lookups seek on its index instead of scanning lower(brand)
+    brand_key = Column(String, unique=True, index=True, nullable=True, default=_brand_key_default)
     total_mentions = Column(Integer, nullable=False, default=0)
     total_responses = Column(Integer, nullable=False, default=0)
     avg_mentions_per_response = Column(Float, nullable=False, default=0.0)
@@ -48,15 +229,235 @@ class BrandSummary(Base):
     last_updated = Column(DateTime, server_default=func.now())
 
 
+class IngestedRun(Base):
+    """One scraper result file that has been loaded, identified by a hash of its content"""
+    __tablename__ = "ingested_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source_file = Column(String, nullable=False)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    responses_loaded = Column(Integer, nullable=False, default=0)
+    mentions_loaded = Column(Integer, nullable=False, default=0)
+    loaded_at = Column(DateTime, server_default=func.now())
+
+
+class IngestedResponse(Base):
+    """Every response already loaded, so overlapping result files aren't counted twice"""
+    __tablename__ = "ingested_responses"
+    
+    response_key = Column(String(64), primary_key=True)
+    run_id = Column(Integer, index=True, nullable=False)
+
+
+class DataVersion(Base):
+    """Single-row counter the loader bumps on every load, so API caches know when to refresh"""
+    __tablename__ = "data_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    total_records = Column(Integer, nullable=True)  # brand_mentions row count, kept up to date by the loader
+    updated_at = Column(DateTime, server_default=func.now())
+
+
+def bump_data_version(db, added_records: int = 0):
+    """
+    Increment the data version and add added_records to the brand_mentions
+    row counter, inside the caller's transaction
+    """
+    row = db.query(DataVersion).filter(DataVersion.id == 1).with_for_update().first()
+    if row is None or row.total_records is None:
+        # No counter yet: count once (this transaction's rows included)
+        total_records = db.query(BrandMention).count()
+    else:
+        total_records = row.total_records + added_records
+    
+    if row is None:
+        db.add(DataVersion(id=1, version=1, total_records=total_records))
+    else:
+        row.version += 1
+        row.total_records = total_records
+        row.updated_at = func.now()
+
+
+def reset_record_count(db):
+    """Zero the brand_mentions row counter (after the table was emptied)"""
+    db.query(DataVersion).filter(DataVersion.id == 1).update({DataVersion.total_records: 0})
+
+
+def get_data_version(db):
+    """Current data version (0 before anything was loaded)"""
+    return db.query(DataVersion.version).filter(DataVersion.id == 1).scalar() or 0
+
+
+def get_total_records(db):
+    """brand_mentions row count from the loader's counter - one primary-key read, no table scan"""
+    return db.query(DataVersion.total_records).filter(DataVersion.id == 1).scalar() or 0
+
+
+def has_untracked_data(db):
+    """
+    True for a database loaded before incremental loading existed: mentions
+    without a run_id, or summaries with no ingested run behind them. Those
+    responses aren't in ingested_responses, so adding a file on top would
+    count them a second time.
+    """
+    if db.query(BrandMention.id).filter(BrandMention.run_id.is_(None)).first() is not None:
+        return True
+    return db.query(IngestedRun.id).first() is None and db.query(BrandSummary.id).first() is not None
+
+
+def find_brand_summary(db, brand: str):
+    """Case-insensitive brand lookup (index seek on brand_key)"""
+    return db.query(BrandSummary).filter(BrandSummary.brand_key == brand_key(brand)).first()
+
+
+def backfill_brand_keys(connection):
+    """
+    Fill brand_key for summary rows written before the column existed.
+    
+    brand_key is unique, so when old rows differ only in case ("Adidas" /
+    "adidas") only the one with the most mentions gets the key. The others
+    keep a NULL key - still listed by /mentions, but brand lookups and new
+    loads go to the keyed row - and are reported; a --rebuild merges them.
+    """
+    table = BrandSummary.__table__
+    taken = {
+        key for (key,) in connection.execute(
+            table.select().with_only_columns([table.c.brand_key]).where(table.c.brand_key.isnot(None))
+        )
+    }
+    rows = connection.execute(
+        table.select().with_only_columns([table.c.id, table.c.brand])
+        .where(table.c.brand_key.is_(None))
+        .order_by(table.c.total_mentions.desc(), table.c.id)
+    ).fetchall()
+    
+    updates, collisions = [], []
+    for row in rows:
+        key = brand_key(row.brand)
+        if key in taken:
+            collisions.append(row.brand)
+            continue
+        taken.add(key)
+        updates.append({"row_id": row.id, "key": key})
+    
+    if updates:
+        connection.execute(
+            table.update().where(table.c.id == bindparam("row_id")).values(brand_key=bindparam("key")),
+            updates
+        )
+    if collisions:
+        logger.warning(f"⚠️  brand_summaries rows differing only in case from another brand were left "
+                       f"without a brand_key: {', '.join(sorted(collisions))} - "
+                       f"run data_loader.py --rebuild to merge them")
+
+
+def backfill_record_count(connection):
+    """
+    Start the brand_mentions row counter for databases loaded before it existed.
+    create_all has just made their data_version table, so the row is usually
+    missing rather than NULL - version 0 is what get_data_version reports for
+    no row, so caches don't see a change.
+    """
+    connection.execute(text(
+        "INSERT INTO data_version (id, version, total_records) "
+        "SELECT 1, 0, (SELECT COUNT(*) FROM brand_mentions) "
+        "WHERE NOT EXISTS (SELECT 1 FROM data_version WHERE id = 1)"
+    ))
+    connection.execute(text(
+        "UPDATE data_version SET total_records = (SELECT COUNT(*) FROM brand_mentions) "
+        "WHERE total_records IS NULL"
+    ))
+
+
+# Data fixes run after missing columns are added, before their indexes are built
+BACKFILLS = {
+    "brand_summaries": backfill_brand_keys,
+    "data_version": backfill_record_count,
+}
+
+
+def migrate_tables(bind=None):
+    """
+    Bring tables created by an older version of the models up to date:
+    add missing (nullable) columns, backfill them and create their indexes.
+    Safe to run repeatedly.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            
+            if table.name in BACKFILLS:
+                BACKFILLS[table.name](connection)
+            
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
+
+
 def create_tables():
-    """Create all database tables"""
+    """Create all database tables and migrate existing ones"""
     Base.metadata.create_all(bind=engine)
+    migrate_tables()
+
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_tables():
+    """
+    create_tables() once per process. Raises if the database can't be
+    reached (the next call tries again); afterwards it's a no-op.
+    """
+    global _schema_ready
+    with _schema_lock:
+        if not _schema_ready:
+            create_tables()
+            _schema_ready = True
+
+
+def schema_ready():
+    return _schema_ready
+
+
+if DB_ASYNC:
+    async def get_db():
+        """Dependency to get database session (AsyncSession - use run_db)"""
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        """Dependency to get database session"""
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
+async def run_db(db, fn, *args):
+    """
+    Call fn(session, *args) with whichever session get_db handed out, without
+    blocking the event loop. Handlers write their queries once, in plain
+    Session style: on an AsyncSession they run through run_sync (every query
+    awaited), on a plain Session in the worker threadpool. Running them on
+    the event loop itself would stall every request - and deadlock once the
+    connection pool runs dry, since finished requests can't return their
+    connections while the loop is blocked.
+    """
+    if isinstance(db, Session):
+        if DB_INLINE:
+            return fn(db, *args)
+        return await run_in_threadpool(fn, db, *args)
+    return await db.run_sync(fn, *args)
+ 
\ No newline at end of file
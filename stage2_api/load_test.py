@@ -0,0 +1,169 @@
+"""
+LOAD TEST - requests/sec and latency percentiles for the API
+
+Hammers the API with concurrent keep-alive GET requests (stdlib only) and
+reports req/s, p50, p95 and p99.
+
+Run from the stage2_api directory:
+    python load_test.py --url http://localhost:8000          # an API that's already running
+    python load_test.py --compare                            # inline vs threadpool vs DB_ASYNC=1 against DATABASE_URL
+
+--compare starts `uvicorn main:app` once per mode against the same
+database (SQLite or Postgres stand-in, data already loaded): DB_INLINE=1
+runs the queries on the event loop like the handlers did before run_db
+(the baseline), then sync Sessions in the threadpool, then DB_ASYNC=1. By default the
+/mentions cache re-checks the data version on every request
+(--check-interval 0), so each request does real database I/O.
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+DEFAULT_PATHS = "/health,/mentions,/mentions/nike,/mentions/nike/details"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _client_worker(host, port, paths, deadline, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def run_load(url, paths, concurrency, duration):
+    """Run concurrency keep-alive clients for duration seconds. Returns the stats dict"""
+    parsed = urlparse(url)
+    latencies, errors = [], []  # list.append is atomic, shared by all client threads
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_client_worker,
+                         args=(parsed.hostname, parsed.port or 80, paths, deadline, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_kinds": Counter(errors).most_common(3),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000
+    }
+
+
+def print_stats(label, stats):
+    print(f"   🔸 {label:<14} {stats['rps']:>8,.0f} req/s   p50 {stats['p50']:7.1f} ms   "
+          f"p95 {stats['p95']:7.1f} ms   p99 {stats['p99']:7.1f} ms   "
+          f"({stats['requests']:,} requests, {stats['errors']} errors)")
+    if stats["error_kinds"]:
+        print(f"      errors: {', '.join(f'{kind} x{count}' for kind, count in stats['error_kinds'])}")
+
+
+def wait_for_server(url, timeout=30):
+    parsed = urlparse(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=2)
+            connection.request("GET", "/")
+            connection.getresponse().read()
+            connection.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(port, env_overrides):
+    env = dict(os.environ, **env_overrides)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+
+
+def compare(args, paths):
+    print(f"\n⏱️ API load test: {args.concurrency} clients x {args.duration:.0f}s, paths {','.join(paths)}")
+    print(f"   database: {os.getenv('DATABASE_URL', '(database.py default)')}")
+    print("=" * 60)
+    modes = [
+        ("inline (before)", {"DB_ASYNC": "0", "DB_INLINE": "1"}),
+        ("sync threadpool", {"DB_ASYNC": "0", "DB_INLINE": "0"}),
+        ("DB_ASYNC=1", {"DB_ASYNC": "1", "DB_INLINE": "0"}),
+    ]
+    for port, (label, mode_env) in enumerate(modes, args.port):
+        server = start_server(port, {
+            **mode_env,
+            "MENTIONS_CACHE_CHECK_INTERVAL": str(args.check_interval)
+        })
+        url = f"http://127.0.0.1:{port}"
+        try:
+            if not wait_for_server(url):
+                print(f"   ❌ {label}: server didn't start")
+                continue
+            run_load(url, paths, args.concurrency, 1)  # warm-up
+            print_stats(label, run_load(url, paths, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Brand Mentions API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API to test (ignored with --compare)")
+    parser.add_argument("--compare", action="store_true",
+                        help="start the API inline, threadpool and DB_ASYNC=1 mode and compare them")
+    parser.add_argument("--port", type=int, default=8100, help="first port for --compare servers")
+    parser.add_argument("--paths", default=DEFAULT_PATHS, help="comma-separated paths, requested round-robin")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per measurement")
+    parser.add_argument("--check-interval", type=float, default=0.0,
+                        help="MENTIONS_CACHE_CHECK_INTERVAL for --compare servers")
+    args = parser.parse_args()
+
+    paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    if args.compare:
+        compare(args, paths)
+    else:
+        print(f"\n⏱️ {args.url}: {args.concurrency} clients x {args.duration:.0f}s")
+        print_stats("result", run_load(args.url, paths, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,28 @@ Brand Mentions API - FastAPI application
 Serves brand mention data extracted from ChatGPT responses
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import text
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List
+import asyncio
 import logging
+import os
+import time
 
-from database import get_db, BrandSummary, BrandMention
+from database import ensure_tables, get_db, get_pool_metrics, get_total_records, run_db, schema_ready
+from cache import MentionsCache
 from models import (
     BrandSummaryResponse, 
     SingleBrandResponse, 
     BrandMentionResponse,
     HealthResponse,
+    ProbeResponse,
     ErrorResponse
 )
 
@@ -24,8 +32,26 @@ from models import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create / migrate the tables before serving, so a database the current
+    loader never touched (no data_version table, no brand_key column) works
+    too. If the database is down the API still starts; the readiness probe
+    retries until it succeeds.
+    """
+    try:
+        await run_in_threadpool(ensure_tables)
+        logger.info("📋 Database tables ready")
+    except Exception as e:
+        logger.error(f"Database setup failed at startup ({type(e).__name__}: {e}) - /health/ready will retry")
+    yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Brand Mentions API",
     description="API for querying sportswear brand mentions extracted from ChatGPT responses",
     version="1.0.0",
@@ -33,6 +59,12 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Seconds the readiness probe waits for SELECT 1
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+# Read-through cache for the /mentions endpoints (refreshed when data_loader runs)
+mentions_cache = MentionsCache()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -54,6 +86,9 @@ async def root():
             "GET /mentions": "Get all brand mention summaries",
             "GET /mentions/{brand}": "Get mentions for specific brand",
             "GET /health": "Health check",
+            "GET /health/live": "Liveness probe (no database)",
+            "GET /health/ready": "Readiness probe (SELECT 1 with a timeout)",
+            "GET /metrics/pool": "Database connection pool metrics (this worker)",
             "GET /docs": "API documentation"
         },
         "brands_tracked": ["Nike", "Adidas", "Hoka", "New Balance", "Jordan"]
@@ -64,8 +99,8 @@ async def root():
 async def health_check(db: Session = Depends(get_db)):
     """Health check endpoint"""
     try:
-        # Test database connection
-        total_records = db.query(BrandMention).count()
+        # Test database connection (the record count is the loader's counter, not a COUNT(*))
+        total_records = await run_db(db, get_total_records)
         database_connected = True
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
@@ -80,6 +115,57 @@ async def health_check(db: Session = Depends(get_db)):
     )
 
 
+@app.get("/health/live", response_model=ProbeResponse)
+async def liveness():
+    """Liveness probe - the process is up and serving; never touches the database"""
+    return ProbeResponse(status="alive", timestamp=datetime.now())
+
+
+@app.get("/health/ready", response_model=ProbeResponse, responses={503: {"model": ProbeResponse}})
+async def readiness(db: Session = Depends(get_db)):
+    """
+    Readiness probe - SELECT 1 answered within HEALTH_CHECK_TIMEOUT seconds,
+    and the tables created / migrated (retried here if startup couldn't), else 503
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            run_db(db, lambda session: session.execute(text("SELECT 1")).scalar()),
+            timeout=HEALTH_CHECK_TIMEOUT
+        )
+        if not schema_ready():
+            await asyncio.wait_for(run_in_threadpool(ensure_tables), timeout=HEALTH_CHECK_TIMEOUT)
+        database_connected = True
+    except Exception as e:
+        logger.error(f"Readiness check failed: {type(e).__name__}: {e}")
+        database_connected = False
+    
+    probe = ProbeResponse(
+        status="ready" if database_connected else "not ready",
+        timestamp=datetime.now(),
+        database_connected=database_connected,
+        latency_ms=round((time.perf_counter() - start) * 1000, 2)
+    )
+    if not database_connected:
+        return JSONResponse(status_code=503, content=probe.model_dump(mode="json"))
+    return probe
+
+
+def json_response(payload: bytes) -> Response:
+    """Serve an already serialized payload from the cache"""
+    return Response(content=payload, media_type="application/json")
+
+
+@app.get("/metrics/pool", response_model=dict)
+async def pool_metrics():
+    """
+    Connection pool metrics for the worker that serves the request: pool
+    size, connections checked out, overflow in use, checkout wait times and
+    timeouts. Each uvicorn worker has its own pool.
+    """
+    return get_pool_metrics()
+
+
 @app.get("/mentions", response_model=BrandSummaryResponse)
 async def get_all_mentions(db: Session = Depends(get_db)):
     """
@@ -91,42 +177,15 @@ async def get_all_mentions(db: Session = Depends(get_db)):
     - Percentages and averages
     """
     try:
-        # Get all brand summaries
-        brand_summaries = db.query(BrandSummary).all()
+        payload = await run_db(db, mentions_cache.get_mentions)
         
-        if not brand_summaries:
+        if payload is None:
             raise HTTPException(
                 status_code=404, 
                 detail="No brand mention data found. Please ensure data has been loaded."
             )
         
-        # Calculate totals
-        total_mentions = sum(brand.total_mentions for brand in brand_summaries)
-        total_responses = max(brand.total_responses for brand in brand_summaries) if brand_summaries else 0
-        
-        # Convert to response models
-        brand_responses = [
-            BrandMentionResponse(
-                brand=brand.brand,
-                total_mentions=brand.total_mentions,
-                total_responses=brand.total_responses,
-                avg_mentions_per_response=brand.avg_mentions_per_response,
-                max_mentions_single_response=brand.max_mentions_single_response,
-                percentage_of_total=brand.percentage_of_total,
-                last_updated=brand.last_updated
-            )
-            for brand in brand_summaries
-        ]
-        
-        # Sort by total mentions (descending)
-        brand_responses.sort(key=lambda x: x.total_mentions, reverse=True)
-        
-        return BrandSummaryResponse(
-            total_mentions=total_mentions,
-            total_responses=total_responses,
-            analysis_date=brand_summaries[0].last_updated if brand_summaries else datetime.now(),
-            brands=brand_responses
-        )
+        return json_response(payload)
     
     except HTTPException:
         raise
@@ -147,23 +206,17 @@ async def get_brand_mentions(brand: str, db: Session = Depends(get_db)):
         Brand mention count or 404 if brand not found
     """
     try:
-        # Case-insensitive brand lookup
-        brand_summary = db.query(BrandSummary).filter(
-            func.lower(BrandSummary.brand) == brand.lower()
-        ).first()
+        # Case-insensitive brand lookup (brand_key index)
+        payloads = await run_db(db, mentions_cache.get_brand, brand)
         
-        if not brand_summary:
+        if not payloads:
             # Return 404 with proper error response
             raise HTTPException(
                 status_code=404,
                 detail=f"Brand '{brand}' not found. Available brands: Nike, Adidas, Hoka, New Balance, Jordan"
             )
         
-        return SingleBrandResponse(
-            brand=brand_summary.brand,
-            total_mentions=brand_summary.total_mentions,
-            exists=True
-        )
+        return json_response(payloads[0])
     
     except HTTPException:
         raise
@@ -184,25 +237,15 @@ async def get_brand_details(brand: str, db: Session = Depends(get_db)):
         Detailed brand statistics including averages and percentages
     """
     try:
-        brand_summary = db.query(BrandSummary).filter(
-            func.lower(BrandSummary.brand) == brand.lower()
-        ).first()
+        payloads = await run_db(db, mentions_cache.get_brand, brand)
         
-        if not brand_summary:
+        if not payloads:
             raise HTTPException(
                 status_code=404,
                 detail=f"Brand '{brand}' not found"
             )
         
-        return BrandMentionResponse(
-            brand=brand_summary.brand,
-            total_mentions=brand_summary.total_mentions,
-            total_responses=brand_summary.total_responses,
-            avg_mentions_per_response=brand_summary.avg_mentions_per_response,
-            max_mentions_single_response=brand_summary.max_mentions_single_response,
-            percentage_of_total=brand_summary.percentage_of_total,
-            last_updated=brand_summary.last_updated
-        )
+        return json_response(payloads[1])
     
     except HTTPException:
         raise
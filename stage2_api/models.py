@@ -3,7 +3,7 @@ Pydantic models for API request/response schemas
 """
 
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 
@@ -54,4 +54,12 @@ class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
     database_connected: bool
-    total_records: int 
\ No newline at end of file
+    total_records: int
+
+
+class ProbeResponse(BaseModel):
+    """Liveness / readiness probe response"""
+    status: str
+    timestamp: datetime
+    database_connected: Optional[bool] = None
+    latency_ms: Optional[float] = None
@@ -0,0 +1,244 @@
+"""
+Tests for data_loader: incremental loading, summaries and schema upgrades
+
+Runs against a throwaway SQLite file (DATABASE_URL is set before database.py
+builds its engine). From the stage2_api directory:
+    python -m pytest test_data_loader.py
+"""
+
+import json
+import os
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="brand_mentions_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ.pop("DB_ASYNC", None)
+
+import pytest
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, Text, func, inspect, text
+
+import data_loader
+from cache import MentionsCache
+from database import (
+    Base, BrandMention, BrandSummary, DataVersion, SessionLocal, engine,
+    create_tables, find_brand_summary, get_data_version, get_total_records
+)
+
+
+def write_jsonl(name, records):
+    """Result file in the checkpoint / JsonlResponseWriter format"""
+    path = os.path.join(_tmp_dir, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        for number, (prompt, timestamp, brand_mentions) in enumerate(records, 1):
+            f.write(json.dumps({
+                "response_number": number,
+                "prompt": prompt,
+                "response_length": 100,
+                "total_mentions": sum(brand_mentions.values()),
+                "brand_mentions": brand_mentions,
+                "timestamp": timestamp
+            }) + "\n")
+    return path
+
+
+RUN_1 = [
+    ("Best running shoes?", "2024-05-01T10:00:00", {"Nike": 2, "Hoka": 1}),
+    ("Best gym shoes?", "2024-05-01T10:01:00", {"Nike": 1, "Hoka": 0}),
+]
+# shares its first response with RUN_1
+RUN_2 = [
+    ("Best gym shoes?", "2024-05-01T10:01:00", {"Nike": 1, "Hoka": 0}),
+    ("Best trail shoes?", "2024-05-02T09:00:00", {"Nike": 0, "Hoka": 3}),
+]
+
+
+def summaries():
+    db = SessionLocal()
+    try:
+        return {
+            summary.brand: (summary.total_mentions, summary.total_responses, summary.max_mentions_single_response)
+            for summary in db.query(BrandSummary)
+        }
+    finally:
+        db.close()
+
+
+def mention_count():
+    db = SessionLocal()
+    try:
+        return db.query(BrandMention).count()
+    finally:
+        db.close()
+
+
+LEGACY_SUMMARIES = [
+    {"brand": "Nike", "total_mentions": 3, "total_responses": 2, "avg_mentions_per_response": 1.5,
+     "max_mentions_single_response": 2, "percentage_of_total": 75.0},
+    {"brand": "Hoka", "total_mentions": 1, "total_responses": 2, "avg_mentions_per_response": 0.5,
+     "max_mentions_single_response": 1, "percentage_of_total": 25.0},
+]
+
+
+def create_legacy_tables(summary_rows=LEGACY_SUMMARIES):
+    """brand_mentions / brand_summaries as the original, non-incremental loader created them"""
+    legacy = MetaData()
+    mentions = Table(
+        "brand_mentions", legacy,
+        Column("id", Integer, primary_key=True),
+        Column("brand", String, nullable=False),
+        Column("count", Integer, nullable=False),
+        Column("prompt_id", Integer, nullable=False),
+        Column("prompt_text", Text, nullable=False),
+        Column("response_text", Text, nullable=False),
+        Column("response_length", Integer, nullable=False),
+        Column("created_at", DateTime, server_default=func.now())
+    )
+    brand_summaries = Table(
+        "brand_summaries", legacy,
+        Column("id", Integer, primary_key=True),
+        Column("brand", String, unique=True, nullable=False),
+        Column("total_mentions", Integer, nullable=False),
+        Column("total_responses", Integer, nullable=False),
+        Column("avg_mentions_per_response", Float, nullable=False),
+        Column("max_mentions_single_response", Integer, nullable=False),
+        Column("percentage_of_total", Float, nullable=False),
+        Column("last_updated", DateTime, server_default=func.now())
+    )
+    legacy.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(mentions.insert(), [
+            {"brand": "Nike", "count": 2, "prompt_id": 1, "prompt_text": "Best running shoes?",
+             "response_text": "...", "response_length": 100},
+            {"brand": "Hoka", "count": 1, "prompt_id": 1, "prompt_text": "Best running shoes?",
+             "response_text": "...", "response_length": 100},
+            {"brand": "Nike", "count": 1, "prompt_id": 2, "prompt_text": "Best gym shoes?",
+             "response_text": "...", "response_length": 100},
+        ])
+        connection.execute(brand_summaries.insert(), summary_rows)
+
+
+@pytest.fixture(autouse=True)
+def empty_database():
+    Base.metadata.drop_all(bind=engine)
+    yield
+    engine.dispose()
+
+
+def test_load_builds_summaries():
+    run_id = data_loader.load_data_to_database(write_jsonl("run1.jsonl", RUN_1))
+
+    assert run_id is not None
+    assert summaries() == {"Nike": (3, 2, 2), "Hoka": (1, 2, 1)}
+    assert mention_count() == 3
+    db = SessionLocal()
+    try:
+        assert get_total_records(db) == 3
+        assert get_data_version(db) == 1
+        assert find_brand_summary(db, "NIKE").brand == "Nike"
+    finally:
+        db.close()
+
+
+def test_reloading_a_file_is_skipped():
+    path = write_jsonl("run1.jsonl", RUN_1)
+    data_loader.load_data_to_database(path)
+
+    assert data_loader.load_data_to_database(path) is None
+    assert summaries() == {"Nike": (3, 2, 2), "Hoka": (1, 2, 1)}
+    assert mention_count() == 3
+
+
+def test_overlapping_file_only_adds_new_responses():
+    data_loader.load_data_to_database(write_jsonl("run1.jsonl", RUN_1))
+    data_loader.load_data_to_database(write_jsonl("run2.jsonl", RUN_2))
+
+    assert summaries() == {"Nike": (3, 3, 2), "Hoka": (4, 3, 3)}
+    assert mention_count() == 4
+
+
+def test_rebuild_replaces_everything():
+    data_loader.load_data_to_database(write_jsonl("run1.jsonl", RUN_1))
+    data_loader.load_data_to_database(write_jsonl("run2.jsonl", RUN_2), clear_existing=True)
+
+    assert summaries() == {"Nike": (1, 2, 1), "Hoka": (3, 2, 3)}
+    assert mention_count() == 2
+
+
+def test_upgraded_database_needs_a_rebuild():
+    create_legacy_tables()
+    path = write_jsonl("run1.jsonl", RUN_1)
+
+    # the old rows have no ingestion history - adding on top would count them twice
+    with pytest.raises(RuntimeError, match="--rebuild"):
+        data_loader.load_data_to_database(path)
+    assert summaries() == {"Nike": (3, 2, 2), "Hoka": (1, 2, 1)}
+    assert mention_count() == 3
+
+    # ...but the schema was migrated
+    columns = {column["name"] for column in inspect(engine).get_columns("brand_summaries")}
+    assert "brand_key" in columns
+    db = SessionLocal()
+    try:
+        assert find_brand_summary(db, "hoka").brand == "Hoka"
+        assert db.query(DataVersion.total_records).scalar() == 3
+        assert get_total_records(db) == 3
+    finally:
+        db.close()
+
+    data_loader.load_data_to_database(path, clear_existing=True)
+    assert summaries() == {"Nike": (3, 2, 2), "Hoka": (1, 2, 1)}
+    assert mention_count() == 3
+
+    # from here on files are added incrementally
+    data_loader.load_data_to_database(write_jsonl("run2.jsonl", RUN_2))
+    assert summaries() == {"Nike": (3, 3, 2), "Hoka": (4, 3, 3)}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM brand_mentions WHERE run_id IS NULL")).scalar() == 0
+
+
+def test_migration_survives_brands_differing_only_in_case():
+    create_legacy_tables(LEGACY_SUMMARIES + [
+        {"brand": "nike", "total_mentions": 1, "total_responses": 2, "avg_mentions_per_response": 0.5,
+         "max_mentions_single_response": 1, "percentage_of_total": 25.0},
+    ])
+
+    create_tables()
+    create_tables()  # runs again on every API start
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("brand_summaries")}
+    assert "ix_brand_summaries_brand_key" in indexes
+    db = SessionLocal()
+    try:
+        # the row with the most mentions owns the key, the duplicate is kept but unkeyed
+        assert find_brand_summary(db, "NIKE").brand == "Nike"
+        assert db.query(BrandSummary).filter(BrandSummary.brand_key.is_(None)).one().brand == "nike"
+    finally:
+        db.close()
+
+
+def test_cached_brand_lookup_ignores_case_duplicates():
+    create_legacy_tables(LEGACY_SUMMARIES + [
+        {"brand": "nike", "total_mentions": 1, "total_responses": 2, "avg_mentions_per_response": 0.5,
+         "max_mentions_single_response": 1, "percentage_of_total": 25.0},
+    ])
+    create_tables()
+
+    cache = MentionsCache(check_interval=0)
+    db = SessionLocal()
+    try:
+        cold = cache.get_brand(db, "nike")
+        assert cache.get_mentions(db) is not None  # fills the brand map from every row
+        warm = cache.get_brand(db, "nike")
+    finally:
+        db.close()
+    assert json.loads(cold[1])["total_mentions"] == 3
+    assert warm == cold
+
+
+def test_brand_case_variants_share_one_summary():
+    data_loader.load_data_to_database(write_jsonl("run1.jsonl", RUN_1))
+    data_loader.load_data_to_database(write_jsonl("run3.jsonl", [
+        ("Best court shoes?", "2024-05-03T08:00:00", {"nike": 4}),
+    ]))
+
+    assert summaries() == {"Nike": (7, 3, 4), "Hoka": (1, 3, 1)}